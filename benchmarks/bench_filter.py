@@ -0,0 +1,65 @@
+"""Benchmark the indexed property filter against the original copy-and-scan filter
+
+Usage: python benchmarks/bench_filter.py [n_properties ...]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import denver_supply_app as app  # noqa: E402
+from tests.synthetic import DATE_RANGES, make_property_df  # noqa: E402
+
+
+SELECTIONS = [
+    ('Construction Starts', DATE_RANGES, 'All'),
+    ('Construction Starts', ['2021-2022', '2023-2024'], 'All'),
+    ('Construction Deliveries', ['2025-2026'], 'Submarket 00003'),
+]
+
+# (data type, first month, last month, submarket) date windows:
+WINDOWS = [
+    ('Construction Starts', 2021 * 12 + 2, 2022 * 12 + 7, 'All'),
+    ('Construction Starts', 2019 * 12, 2026 * 12 + 11, 'Submarket 00003'),
+    ('Construction Deliveries', 2023 * 12, 2024 * 12 + 11, 'All'),
+]
+
+
+def best_of(func, repeat=5, number=10):
+    """Best average seconds per call over several timing runs"""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'selection':<45} {'scan ms':>10} {'index ms':>10} {'speedup':>8}")
+    for n in sizes:
+        df = make_property_df(n)
+        index = app.build_property_index(df)
+        for data_type, date_ranges, submarket in SELECTIONS:
+            # Both paths must return the same rows in the same order:
+            expected = app.filter_property_data(df, data_type, date_ranges, submarket)
+            result = app.filter_property_data(df, data_type, date_ranges, submarket, index=index)
+            assert expected.index.equals(result.index)
+
+            scan = best_of(lambda: app.filter_property_data(df, data_type, date_ranges, submarket))
+            indexed = best_of(lambda: app.filter_property_data(df, data_type, date_ranges, submarket, index=index))
+            label = f"{data_type[13:]} {len(date_ranges)} ranges, {submarket}"
+            print(f"{n:>10,} {label:<45} {scan*1e3:>10.3f} {indexed*1e3:>10.3f} {scan/indexed:>7.1f}x")
+
+        # Date windows: month scan vs cumulative time index slices:
+        time_index = app.build_time_index(df, sorted(df['SubmarketName'].dropna().unique().tolist()))
+        for data_type, first, last, submarket in WINDOWS:
+            expected = app.filter_property_data(df, data_type, [], submarket, date_window=(first, last))
+            result = app.filter_property_data(df, data_type, [], submarket, date_window=(first, last), time_index=time_index)
+            assert expected.index.equals(result.index)
+
+            scan = best_of(lambda: app.filter_property_data(df, data_type, [], submarket, date_window=(first, last)))
+            indexed = best_of(lambda: app.filter_property_data(df, data_type, [], submarket, date_window=(first, last), time_index=time_index))
+            label = f"{data_type[13:]} {app.month_label(first)}..{app.month_label(last)}, {submarket}"
+            print(f"{n:>10,} {label:<45} {scan*1e3:>10.3f} {indexed*1e3:>10.3f} {scan/indexed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,57 @@
+"""Benchmark CSV vs typed Parquet ingestion (load time & resident DataFrame size)
+
+Usage: python benchmarks/bench_ingest.py [n_properties ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import denver_supply_app as app  # noqa: E402
+from tests.synthetic import make_property_df  # noqa: E402
+
+
+def timed_load(func, repeat=3):
+    """Best-of-n seconds for a load, plus the loaded frame"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = func()
+        best = min(best, time.perf_counter() - start)
+    return df, best
+
+
+def compare(label, csv_file, parquet_file):
+    """Time plain CSV, typed CSV & typed Parquet loads of one file"""
+    raw_df, raw_s = timed_load(lambda: pd.read_csv(csv_file))
+    typed_df, typed_s = timed_load(lambda: app.apply_schema(pd.read_csv(csv_file), app.PROPERTY_SCHEMA))
+    parquet_df, parquet_s = timed_load(lambda: app.read_table(parquet_file, csv_file, app.PROPERTY_SCHEMA))
+    assert parquet_df.dtypes.equals(typed_df.dtypes)
+    for name, df, seconds in [('csv (inferred)', raw_df, raw_s), ('csv + schema', typed_df, typed_s), ('parquet', parquet_df, parquet_s)]:
+        mb = df.memory_usage(deep=True).sum() / 1024**2
+        print(f"{label:>12} {name:<16} {seconds*1e3:>10.1f} {mb:>10.2f} {raw_s/seconds:>8.1f}x")
+
+
+def main(sizes):
+    print(f"{'rows':>12} {'source':<16} {'load ms':>10} {'memory MB':>10} {'vs csv':>9}")
+    denver_csv = app.market_files(app.DEFAULT_MARKET)['property_csv']
+    if os.path.exists(denver_csv):
+        with tempfile.TemporaryDirectory() as tmp:
+            parquet_file = os.path.join(tmp, 'properties.parquet')
+            app.apply_schema(pd.read_csv(denver_csv), app.PROPERTY_SCHEMA).to_parquet(parquet_file, index=False)
+            compare('denver', denver_csv, parquet_file)
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_file, parquet_file = os.path.join(tmp, 'properties.csv'), os.path.join(tmp, 'properties.parquet')
+            make_property_df(n).to_csv(csv_file, index=False)
+            app.apply_schema(pd.read_csv(csv_file), app.PROPERTY_SCHEMA).to_parquet(parquet_file, index=False)
+            compare(f"{n:,}", csv_file, parquet_file)
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [100_000, 1_000_000])
@@ -0,0 +1,35 @@
+"""Benchmark the vectorized heatmap/point-layer builders against the original row-by-row code (tests/test_map_layers.py checks their outputs match)
+
+Usage: python benchmarks/bench_map_layers.py [n_properties ...]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import denver_supply_app as app  # noqa: E402
+from tests.helpers import heat_data_rowwise, points_json_compact, points_json_rowwise  # noqa: E402
+from tests.synthetic import make_property_df  # noqa: E402
+
+
+def timed(func, *args):
+    """Run func once, returning (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'layer':<10} {'row-wise s':>12} {'vectorized s':>13} {'speedup':>8}")
+    for n in sizes:
+        df = make_property_df(n)
+        for layer, old, new in [('heatmap', heat_data_rowwise, app.build_heat_data), ('points', points_json_rowwise, points_json_compact)]:
+            _, old_s = timed(old, df)
+            _, new_s = timed(new, df)
+            print(f"{n:>10,} {layer:<10} {old_s:>12.3f} {new_s:>13.4f} {old_s/new_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
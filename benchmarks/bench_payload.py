@@ -0,0 +1,65 @@
+"""Report the GeoJSON/heatmap bytes each map layer sends before & after compact serialization
+
+Usage: python benchmarks/bench_payload.py [n_properties ...]
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geopandas as gpd  # noqa: E402
+import denver_supply_app as app  # noqa: E402
+from tests.synthetic import write_dataset  # noqa: E402
+
+
+def full_points_json(property_df):
+    """Point layer as it was sent before: every column, full-precision coordinates"""
+    geometry = gpd.points_from_xy(property_df['Longitude'].to_numpy(), property_df['Latitude'].to_numpy())
+    for col in property_df.select_dtypes(include='datetime').columns:
+        property_df = property_df.assign(**{col: property_df[col].dt.strftime('%Y-%m-%d')})
+    return gpd.GeoDataFrame(property_df, geometry=geometry, crs='EPSG:4326').to_json()
+
+
+def layer_payloads(property_df, ratio_df, submarket_gdf):
+    """(layer, bytes before, bytes after) for each layer the app draws"""
+    zoom = app.get_map_center(submarket_gdf, 'All')[2]
+    points_df = property_df.head(app.MAX_PROPERTY_POINTS)
+    cluster_df = app.cluster_properties(property_df, zoom)
+    geometry_lods = app.build_geometry_lods(submarket_gdf)
+    level = app.select_geometry_level(geometry_lods, zoom)
+    ratio_df = app.filter_ratio_data(ratio_df, sorted(ratio_df['year_range'].dropna().unique()), 'All')
+    ratio_gdf = level['gdf'].merge(ratio_df, left_on='Submarket', right_on='SubmarketName', how='left')
+    ratio_gdf['color'] = app.create_color_scale(ratio_gdf['demand_supply_ratio'].fillna(1).tolist())
+
+    def ratio_map_payload(map_obj):
+        return sum(len(json.dumps(child.data)) for child in map_obj._children.values() if isinstance(getattr(child, 'data', None), dict))
+
+    return [
+        ('points', len(full_points_json(points_df)), len(json.dumps(app.compact_point_features(points_df, ['PropertyName', 'UnitCount', 'SubmarketName'])))),
+        ('clusters', len(full_points_json(cluster_df)), len(json.dumps(app.compact_point_features(cluster_df, ['PropertyCount', 'UnitCount'])))),
+        ('heatmap', len(json.dumps(app.build_heat_data(property_df))), len(json.dumps(app.build_heat_data(property_df, precision=app.COORDINATE_PRECISION)))),
+        ('submarket outlines', len(level['gdf'].to_json(drop_id=False)), len(json.dumps(app.geometry_level_features(level, 'All')))),
+        ('ratio polygons', len(ratio_gdf.to_json()), ratio_map_payload(app.create_ratio_map(ratio_df, submarket_gdf, 'All', geometry_lods=geometry_lods))),
+    ]
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'layer':<20} {'before KB':>10} {'after KB':>10} {'saved':>7}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_dataset(tmp, n)
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                property_df, ratio_df, submarket_gdf = app.load_market_tables(app.DEFAULT_MARKET)
+            finally:
+                os.chdir(cwd)
+        for layer, before, after in layer_payloads(property_df, ratio_df, submarket_gdf):
+            print(f"{n:>10,} {layer:<20} {before/1024:>10.1f} {after/1024:>10.1f} {1 - after/before:>6.0%}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10_000, 100_000])
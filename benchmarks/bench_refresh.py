@@ -0,0 +1,49 @@
+"""Benchmark refreshing a loaded market from a delta file & a new extract against reloading the whole market
+
+Usage: python benchmarks/bench_refresh.py [n_properties ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import denver_supply_app as app  # noqa: E402
+from tests.synthetic import write_dataset  # noqa: E402
+from tests.helpers import check_same, rewrite_extract, write_delta  # noqa: E402
+
+
+def timed(func):
+    """Call func once & return its result with the seconds it took"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'full load ms':>13} {'delta ms':>9} {'extract ms':>11} {'speedup':>8}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_dataset(tmp, n)
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                market_data = app.build_market(app.DEFAULT_MARKET)
+                write_delta(market_data, n)
+                refreshed, refresh_s = timed(lambda: app.refresh_market(market_data))
+                rebuilt, full_s = timed(lambda: app.build_market(app.DEFAULT_MARKET))
+                check_same(refreshed, rebuilt)
+
+                # A new extract must keep the rows of the delta file already loaded:
+                rewrite_extract()
+                refreshed, extract_s = timed(lambda: app.refresh_market(refreshed))
+                check_same(refreshed, app.build_market(app.DEFAULT_MARKET))
+            finally:
+                os.chdir(cwd)
+        print(f"{n:>10,} {full_s*1e3:>13.1f} {refresh_s*1e3:>9.1f} {extract_s*1e3:>11.1f} {full_s/refresh_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
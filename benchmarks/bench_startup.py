@@ -0,0 +1,68 @@
+"""Benchmark app start-up: module import time & time to first render (headless, via streamlit's AppTest)
+
+Each measurement runs in a fresh Python process, so nothing is already imported or cached.
+
+Usage: python benchmarks/bench_startup.py [n_properties] [--repeat N]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from tests.synthetic import write_dataset  # noqa: E402
+APP_FILE = os.path.join(REPO_DIR, 'denver_supply_app.py')
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import denver_supply_app
+print(time.perf_counter() - start)
+"""
+
+FIRST_RENDER_SCRIPT = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file('denver_supply_app.py', default_timeout=600).run()
+first = time.perf_counter() - start
+assert not app.exception, app.exception
+start = time.perf_counter()
+app.run()
+print(first, time.perf_counter() - start)
+"""
+
+
+def run_timed(script, cwd):
+    """Run a timing script in a fresh interpreter & return the numbers it prints"""
+    result = subprocess.run([sys.executable, '-c', script], cwd=cwd, capture_output=True, text=True, check=True)
+    return [float(v) for v in result.stdout.split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('n_properties', nargs='?', type=int, default=575, help='synthetic properties to load (default: Denver-sized)')
+    parser.add_argument('--submarkets', type=int, default=19)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [run_timed(IMPORT_SCRIPT, REPO_DIR)[0] for _ in range(args.repeat)]
+    print(f"import denver_supply_app:     median {statistics.median(imports)*1e3:8.1f} ms  (min {min(imports)*1e3:.1f} ms)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_dataset(tmp, args.n_properties, args.submarkets)
+        shutil.copy(APP_FILE, tmp)
+        renders = [run_timed(FIRST_RENDER_SCRIPT, tmp) for _ in range(args.repeat)]
+    first, rerun = [r[0] for r in renders], [r[1] for r in renders]
+    print(f"time to first render:         median {statistics.median(first)*1e3:8.1f} ms  (min {min(first)*1e3:.1f} ms)  [{args.n_properties:,} properties, {args.submarkets:,} submarkets]")
+    print(f"warm rerun:                   median {statistics.median(rerun)*1e3:8.1f} ms  (min {min(rerun)*1e3:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
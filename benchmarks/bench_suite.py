@@ -0,0 +1,148 @@
+"""Headless benchmark suite: time the app's data & map pipeline on synthetic datasets of increasing size
+
+Runs every stage without a Streamlit server and writes the results as JSON, so scaling limits can be
+compared release to release.
+
+Usage: python benchmarks/bench_suite.py [--properties 1000 10000 ...] [--submarkets 10 100 ...] [--output FILE]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import denver_supply_app as app  # noqa: E402
+from tests.synthetic import DATE_RANGES, submarket_names, write_dataset  # noqa: E402
+
+
+DEFAULT_PROPERTIES = [10**3, 10**4, 10**5, 10**6]
+DEFAULT_SUBMARKETS = [10**1, 10**2, 10**3, 10**4]
+
+
+def measure(func, repeat):
+    """Time func over several runs, returning (timings, last result)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def run_case(n_properties, n_submarkets, repeat):
+    """Time each pipeline stage for one dataset size"""
+    results = []
+
+    def record(stage, func, repeat=repeat, nbytes=None):
+        timings, result = measure(func, repeat)
+        results.append({
+            'n_properties': n_properties,
+            'n_submarkets': n_submarkets,
+            'stage': stage,
+            'seconds_min': min(timings),
+            'seconds_median': statistics.median(timings),
+            'repeat': len(timings),
+            'bytes': nbytes(result) if nbytes else None,
+        })
+        print(f"{n_properties:>9,} {n_submarkets:>7,}  {stage:<34} {min(timings)*1e3:>11.1f} ms")
+        return result
+
+    one_submarket = submarket_names(n_submarkets)[0]
+    with tempfile.TemporaryDirectory() as tmp:
+        write_dataset(tmp, n_properties, n_submarkets)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            # Loading (the market store is emptied first, so each run reads & builds the whole market):
+            def load_data_cold():
+                app.get_market_store().clear()
+                return app.load_data()
+
+            record('load_data (cold)', load_data_cold)
+            market_data = record('build_market', lambda: app.build_market(app.DEFAULT_MARKET), repeat=1)
+            # Parts of build_market:
+            raw_property_df, _, _ = record('read_market_tables', lambda: app.read_market_tables(app.DEFAULT_MARKET), repeat=1)
+            record('hash_rows', lambda: app.hash_rows(raw_property_df, app.PROPERTY_SCHEMA), repeat=1)
+        finally:
+            os.chdir(cwd)
+    property_df, ratio_df, submarket_gdf = market_data['property_df'], market_data['ratio_df'], market_data['submarket_gdf']
+    record('reconcile_submarkets', lambda: app.reconcile_submarkets(raw_property_df, submarket_gdf), repeat=1)
+
+    # Structures built once at load time:
+    property_index = record('build_property_index', lambda: app.build_property_index(property_df), repeat=1)
+    supply_cube = record('build_supply_cube', lambda: app.build_supply_cube(property_df), repeat=1)
+    record('build_time_index', lambda: app.build_time_index(property_df, supply_cube['submarkets']), repeat=1)
+    ratio_cube = record('build_ratio_cube', lambda: app.build_ratio_cube(ratio_df), repeat=1)
+    geometry_lods = record('build_geometry_lods', lambda: app.build_geometry_lods(submarket_gdf), repeat=1)
+
+    # Filtering:
+    record('filter_property_data (scan, all)', lambda: app.filter_property_data(property_df, 'Construction Starts', DATE_RANGES, 'All'))
+    filtered_df = record('filter_property_data (index, all)', lambda: app.filter_property_data(property_df, 'Construction Starts', DATE_RANGES, 'All', index=property_index))
+    submarket_df = record('filter_property_data (index, one)', lambda: app.filter_property_data(property_df, 'Construction Starts', DATE_RANGES[1:3], one_submarket, index=property_index))
+    record('filter_ratio_data (groupby)', lambda: app.filter_ratio_data(ratio_df, DATE_RANGES[1:3], 'All'))
+    filtered_ratio_df = record('filter_ratio_data (cube)', lambda: app.filter_ratio_data(ratio_df, DATE_RANGES[1:3], 'All', cube=ratio_cube))
+
+    # Map building & HTML serialization:
+    one_submarket_gdf = app.filter_submarket_gdf(submarket_gdf, one_submarket)
+    property_map = record('create_property_map (all)', lambda: app.create_property_map(filtered_df, submarket_gdf, 'Construction Starts', 'All', 1.0, geometry_lods=geometry_lods))
+    record('create_property_map (one)', lambda: app.create_property_map(submarket_df, one_submarket_gdf, 'Construction Starts', one_submarket, 1.0, geometry_lods=geometry_lods))
+    ratio_map = record('create_ratio_map (all)', lambda: app.create_ratio_map(filtered_ratio_df, submarket_gdf, 'All', geometry_lods=geometry_lods))
+    record('render property map html', lambda: property_map.get_root().render(), nbytes=len)
+    record('render ratio map html', lambda: ratio_map.get_root().render(), nbytes=len)
+    return results
+
+
+def environment():
+    """Describe the machine & library versions the results came from"""
+    import folium
+    import geopandas
+    import numpy
+    import pandas
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'versions': {lib.__name__: lib.__version__ for lib in [pandas, numpy, geopandas, folium]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--properties', type=int, nargs='+', default=DEFAULT_PROPERTIES)
+    parser.add_argument('--submarkets', type=int, nargs='+', default=DEFAULT_SUBMARKETS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=os.path.join(REPO_DIR, 'benchmarks', 'results.json'))
+    args = parser.parse_args()
+
+    # Maps are built as with both map toggles switched on:
+    app.st.session_state.heatmap = True
+    app.st.session_state.tiles = True
+
+    print(f"{'props':>9} {'subs':>7}  {'stage':<34} {'best':>14}")
+    results = []
+    for n_submarkets in args.submarkets:
+        for n_properties in args.properties:
+            results.extend(run_case(n_properties, n_submarkets, args.repeat))
+
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
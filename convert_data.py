@@ -0,0 +1,11 @@
+"""Convert the CoStar CSV extracts to typed Parquet files for faster app start-up
+
+Usage: python convert_data.py
+"""
+
+import denver_supply_app as app
+
+
+if __name__ == "__main__":
+    for parquet_file in app.convert_to_parquet():
+        print(f"Wrote {parquet_file}")
@@ -2,17 +2,17 @@
 
 import pandas as pd
 import numpy as np
-import geopandas as gpd
-from shapely.geometry import Polygon, Point
-import unicodedata
-import re
+import os
+import json
+import time
+import hashlib
+import uuid
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 import streamlit as st
-import leafmap.foliumap as leafmap
-from folium.plugins import HeatMap
-import folium
+# Slow-to-import geo & mapping libraries (geopandas, shapely, folium, streamlit_folium) are imported inside the functions that use them
 # from folium.plugins import MarkerCluster
-from streamlit_folium import st_folium # type:ignore
-import matplotlib.pyplot as plt
 
 
 ##### SET FILE PATHS & CONSTANTS #####
@@ -20,18 +20,131 @@ import matplotlib.pyplot as plt
 # path = 'c:\\Users\\john.hazelton\\OneDrive - Cortland\\Documents\\Research & Strategy\\Code\\Steamlit App\\data\costar_denver_property_construction.csv'
 # sm_path = 'c:\\Users\\john.hazelton\\OneDrive - Cortland\\Documents\\Research & Strategy\\Code\\Steamlit App\\data\costar_denver_submarket_demand_supply.csv'
 # geo_path = 'c:\\Users\\john.hazelton\\OneDrive - Cortland\\Documents\\Research & Strategy\\Code\\Steamlit App\\data\\denver.geojson'
-path= 'data/costar_denver_property_construction.csv'
-sm_path = 'data/costar_denver_submarket_demand_supply.csv'
-geo_path = 'data/denver.geojson' 
+# Each market's extracts live in DATA_DIR as costar_<market>_property_construction.csv, costar_<market>_submarket_demand_supply.csv & <market>.geojson:
+DATA_DIR = 'data'
+DEFAULT_MARKET = 'denver'
+# Typed columnar copies of the CSVs sit next to them as .parquet files (written by convert_data.py; used when newer than the CSVs)
+
+# Column types for the property & demand/supply tables (CSV columns not listed keep pandas' inferred type):
+PROPERTY_SCHEMA = {
+    'PropertyName': 'string',
+    'StartDate': 'datetime64[ns]',
+    'Year Completed/Expected': 'Int16',
+    'ConstructionStatus': 'category',
+    'UnitCount': 'Int32',  # Nullable, as some rows leave it blank
+    'MarketName': 'category',
+    'SubmarketName': 'category',
+    'Latitude': 'float32',
+    'Longitude': 'float32',
+    'Year Started/Expected': 'float32',  # Some start years are imputed fractions
+    'Start_year_range': 'category',
+    'Completion_year_range': 'category',
+}
+RATIO_SCHEMA = {
+    'SubmarketName': 'category',
+    'year_range': 'category',
+    'Demand': 'float64',
+    'Supply': 'float64',
+    'demand_supply_ratio': 'float64',
+}
+
+# Property columns indexed at load time for fast filtering:
+PROPERTY_INDEX_COLUMNS = ['Start_year_range', 'Completion_year_range', 'SubmarketName']
+# Date range column used by each property data type:
+DATE_RANGE_COLUMNS = {'Construction Starts': 'Start_year_range', 'Construction Deliveries': 'Completion_year_range'}
+
+# Months between time index steps for each data type (completions are only known to the year, so they sit in January of it):
+TIME_INDEX_STEP_MONTHS = {'Construction Starts': 1, 'Construction Deliveries': 12}
+
+# Supply cube row holding properties with no submarket label:
+UNLABELED_SUBMARKET = ''
+
+# Map zoom levels with a pre-simplified copy of the submarket polygons (deeper zooms use the last level):
+GEOMETRY_LOD_ZOOMS = [6, 8, 10, 12, 14]
+
+# Decimal places kept in property coordinates sent to the browser (5 places is about 1 m) & in heatmap weights:
+COORDINATE_PRECISION = 5
+HEAT_WEIGHT_PRECISION = 8
+
+# Above this many properties in view, points are aggregated into grid clusters (cell sizes in screen pixels):
+MAX_PROPERTY_POINTS = 2000
+CLUSTER_CELL_PIXELS = 40
+HEAT_CELL_PIXELS = 8
+# Width & height of the maps on the page, in screen pixels:
+MAP_PIXELS = 700
+
+# Properties per chunk when joining property points to submarket polygons:
+SPATIAL_JOIN_CHUNK_SIZE = 250_000
+# Outcomes of checking a property's submarket label against the polygon it falls in:
+SUBMARKET_CHECK_STATUSES = ['match', 'assigned', 'mismatch', 'outside']
+
+# 256-step colormaps as hex colors (precomputed from matplotlib, so it isn't needed at runtime):
+RDYLBU_R_COLORS = [
+    '#313695', '#313896', '#323a97', '#333d98', '#343f99', '#34429b', '#35449c', '#36479d',
+    '#37499e', '#384c9f', '#384ea1', '#3951a2', '#3a53a3', '#3b56a4', '#3b58a6', '#3c5ba7',
+    '#3d5da8', '#3e60a9', '#3f62aa', '#3f64ac', '#4067ad', '#4169ae', '#426caf', '#436eb0',
+    '#4371b2', '#4473b3', '#4576b4', '#4778b5', '#497ab6', '#4b7cb7', '#4d7eb9', '#4f81ba',
+    '#5083bb', '#5285bc', '#5487bd', '#5689be', '#588cbf', '#5a8ec1', '#5c90c2', '#5d92c3',
+    '#5f94c4', '#6197c5', '#6399c6', '#659bc7', '#679dc9', '#689fca', '#6aa2cb', '#6ca4cc',
+    '#6ea6cd', '#70a8ce', '#72aacf', '#74add1', '#76aed1', '#78b0d2', '#7ab2d3', '#7cb3d4',
+    '#7eb5d5', '#80b7d6', '#83b9d7', '#85bad8', '#87bcd9', '#89beda', '#8bbfdb', '#8dc1dc',
+    '#90c3dd', '#92c5de', '#94c6df', '#96c8e0', '#98cae1', '#9acce1', '#9ccde2', '#9fcfe3',
+    '#a1d1e4', '#a3d2e5', '#a5d4e6', '#a7d6e7', '#a9d8e8', '#acd9e9', '#aedae9', '#b0dbea',
+    '#b2dceb', '#b4ddeb', '#b6deec', '#b8dfec', '#bae0ed', '#bce1ee', '#bee2ee', '#c0e3ef',
+    '#c2e4ef', '#c4e5f0', '#c7e6f0', '#c9e7f1', '#cbe8f2', '#cde9f2', '#cfeaf3', '#d1ebf3',
+    '#d3ecf4', '#d5edf5', '#d7eef5', '#d9eff6', '#dbf0f6', '#ddf1f7', '#e0f3f7', '#e1f3f5',
+    '#e2f3f3', '#e3f4f1', '#e4f4ef', '#e6f5ec', '#e7f5ea', '#e8f6e8', '#e9f6e6', '#eaf7e3',
+    '#ecf7e1', '#edf8df', '#eef8dd', '#eff9da', '#f1f9d8', '#f2fad6', '#f3fad4', '#f4fbd2',
+    '#f5fbcf', '#f7fbcd', '#f8fccb', '#f9fcc9', '#fafdc6', '#fbfdc4', '#fdfec2', '#fefec0',
+    '#fefebe', '#fefdbc', '#fefbba', '#fefab8', '#fef9b6', '#fef8b4', '#fef7b3', '#fef5b1',
+    '#fef4af', '#fef3ad', '#fef2ab', '#fef1a9', '#feefa7', '#feeea6', '#feeda4', '#feeca2',
+    '#feeaa0', '#fee99e', '#fee89c', '#fee79b', '#fee699', '#fee497', '#fee395', '#fee293',
+    '#fee191', '#fee090', '#fdde8e', '#fddc8c', '#fdda8a', '#fdd888', '#fdd686', '#fdd484',
+    '#fdd283', '#fdd081', '#fdce7f', '#fdcc7d', '#fdca7b', '#fdc879', '#fdc678', '#fdc476',
+    '#fdc274', '#fdc072', '#fdbe70', '#fdbc6e', '#fdba6c', '#fdb86b', '#fdb669', '#fdb467',
+    '#fdb265', '#fdb063', '#fdae61', '#fcac60', '#fcaa5f', '#fca75e', '#fba55c', '#fba25b',
+    '#fb9f5a', '#fa9d59', '#fa9a58', '#fa9857', '#f99555', '#f99354', '#f89053', '#f88e52',
+    '#f88b51', '#f7894f', '#f7864e', '#f7834d', '#f6814c', '#f67e4b', '#f67c4a', '#f57948',
+    '#f57747', '#f57446', '#f47245', '#f46f44', '#f46d43', '#f26a41', '#f16840', '#f0653f',
+    '#ef633e', '#ee613d', '#ed5e3c', '#ec5c3b', '#ea593a', '#e95739', '#e85538', '#e75236',
+    '#e65035', '#e54d34', '#e44b33', '#e24932', '#e14631', '#e04430', '#df412f', '#de3f2e',
+    '#dd3d2d', '#dc3a2b', '#da382a', '#d93529', '#d83328', '#d73127', '#d62f26', '#d42d26',
+    '#d22b26', '#d02926', '#ce2726', '#cc2526', '#ca2326', '#c82126', '#c62026', '#c41e26',
+    '#c21c26', '#c01a26', '#be1826', '#bc1626', '#ba1426', '#b81226', '#b61026', '#b40f26',
+    '#b20d26', '#b00b26', '#ae0926', '#ac0726', '#aa0526', '#a80326', '#a60126', '#a50026',
+]
+COLORMAPS = {'RdYlBu_r': RDYLBU_R_COLORS}
+
+# Map layer cache limits (override with environment variables); layers for each panned/zoomed view get their own cache, so panning doesn't push out whole maps:
+MAP_CACHE_MAX_ENTRIES = int(os.environ.get('DENVER_MAP_CACHE_MAX_ENTRIES', 32))
+MAP_CACHE_MAX_BYTES = int(os.environ.get('DENVER_MAP_CACHE_MAX_MB', 256)) * 1024**2
+VIEWPORT_CACHE_MAX_ENTRIES = int(os.environ.get('DENVER_VIEWPORT_CACHE_MAX_ENTRIES', 256))
+VIEWPORT_CACHE_MAX_BYTES = int(os.environ.get('DENVER_VIEWPORT_CACHE_MAX_MB', 128)) * 1024**2
+
+# Weekly drops can also come as delta files (costar_<market>_property_construction_delta*.csv, costar_<market>_submarket_demand_supply_delta*.csv) whose rows replace rows with the same key:
+PROPERTY_KEY_COLUMNS = ['PropertyName', 'Latitude', 'Longitude']
+RATIO_KEY_COLUMNS = ['SubmarketName', 'year_range']
+# How often (in seconds) a loaded market checks its files for new data (set DENVER_DATA_REFRESH_SECONDS to 0 to turn off):
+DATA_REFRESH_SECONDS = float(os.environ.get('DENVER_DATA_REFRESH_SECONDS', 60))
+
+# Memory budget for loaded markets shared across sessions (least recently used markets are dropped past it):
+MARKET_CACHE_MAX_BYTES = int(os.environ.get('DENVER_MARKET_CACHE_MAX_MB', 1024)) * 1024**2
+
+# JSON lines log of per-rerun stage timings & payload sizes (off unless DENVER_TIMING_LOG names a file, as it grows with every rerun):
+TIMING_LOG_PATH = os.environ.get('DENVER_TIMING_LOG', '')
 
 
 # Initialize session state for filters
+if 'market' not in st.session_state:
+    st.session_state.market = DEFAULT_MARKET
 if 'data_type' not in st.session_state:
     st.session_state.data_type = 'Construction Starts'
 if 'date_ranges' not in st.session_state:
-    st.session_state.date_ranges = ['2018-2020', '2021-2022', '2023-2024', '2025-2026', '2027-2028']
+    st.session_state.date_ranges = []  # Empty = every date range the market's data has
 if 'submarket' not in st.session_state:
     st.session_state.submarket = 'All'
+if 'date_window' not in st.session_state:
+    st.session_state.date_window = None  # None = filter by the date ranges instead
 
 
 
@@ -39,17 +152,64 @@ if 'submarket' not in st.session_state:
 
 # @st.experimental_rerun()
 # st.rerun()
-@st.cache_data
 
-def load_data():    
+def load_data(market=DEFAULT_MARKET):    
+    """Get a market's property, demand/supply & submarket polygon tables (shared read-only across sessions)"""
+    market_data = load_market(market)
+    return market_data['property_df'], market_data['ratio_df'], market_data['submarket_gdf']
+
+
+def market_files(market):
+    """File paths for one market's extracts & their typed Parquet copies"""
+    return {
+        'property_csv': os.path.join(DATA_DIR, f'costar_{market}_property_construction.csv'),
+        'property_parquet': os.path.join(DATA_DIR, f'costar_{market}_property_construction.parquet'),
+        'ratio_csv': os.path.join(DATA_DIR, f'costar_{market}_submarket_demand_supply.csv'),
+        'ratio_parquet': os.path.join(DATA_DIR, f'costar_{market}_submarket_demand_supply.parquet'),
+        'geojson': os.path.join(DATA_DIR, f'{market}.geojson'),
+    }
+
+
+def available_markets(data_dir=DATA_DIR):
+    """List the markets with a property extract in the data folder"""
+    suffixes = ('_property_construction.csv', '_property_construction.parquet')
+    markets = set()
+    if os.path.isdir(data_dir):
+        for file_name in os.listdir(data_dir):
+            if file_name.startswith('costar_') and file_name.endswith(suffixes):
+                markets.add(file_name[len('costar_'):].rsplit('_property_construction', 1)[0])
+    return sorted(markets) or [DEFAULT_MARKET]
+
+
+def market_label(market):
+    """Display name for a market"""
+    return market.replace('_', ' ').title()
+
+
+def load_market_tables(market):
+    """Read one market's property, demand/supply & submarket polygon tables from disk"""
+    df, ratio_df, submarket_gdf = read_market_tables(market)
+
+    # Check property submarket labels against the submarket polygons (& fill in missing ones):
+    df = reconcile_submarkets(df, submarket_gdf)
+
+    return df, ratio_df, submarket_gdf
+
+
+def read_market_tables(market):
+    """Read one market's tables as they are on disk (property submarket labels not yet checked)"""
+    import geopandas as gpd
+
+    files = market_files(market)
+
     # Load property construction data:
-    df = pd.read_csv(path)
+    df = read_table(files['property_parquet'], files['property_csv'], PROPERTY_SCHEMA)
 
     # Load submarket demand vs supply data:
-    ratio_df = pd.read_csv(sm_path)
+    ratio_df = read_table(files['ratio_parquet'], files['ratio_csv'], RATIO_SCHEMA)
 
     # Load submarket GeoDataFrame:
-    submarket_gdf = gpd.read_file(geo_path)
+    submarket_gdf = gpd.read_file(files['geojson'])
     submarket_gdf.rename(columns={'SubName':'Submarket','CBSAName':'Market'}, inplace=True)
     submarket_gdf = submarket_gdf[['Submarket','Market','geometry']]
     submarket_gdf['Submarket'] = submarket_gdf['Submarket'].str.rstrip()
@@ -57,35 +217,531 @@ def load_data():
     return df, ratio_df, submarket_gdf
 
 
-def filter_property_data(df, data_type, date_ranges, submarket):
-    """Filter property data based on user selections"""
+def apply_schema(df, schema):
+    """Cast a table's columns to their schema types"""
+    df = df.copy()
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        if dtype.startswith('datetime'):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif dtype == 'category':
+            # Range columns can hold literal "nan" strings, which should be missing values:
+            df[col] = df[col].replace({'nan': np.nan, '': np.nan}).astype('category')
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def read_table(parquet_file, csv_file, schema):
+    """Read a typed table from its Parquet copy when it is up to date, otherwise from the CSV"""
+    if os.path.exists(parquet_file) and (not os.path.exists(csv_file) or os.path.getmtime(parquet_file) >= os.path.getmtime(csv_file)):
+        try:
+            # Memory-map the file so Arrow reads straight from the page cache:
+            return pd.read_parquet(parquet_file, engine='pyarrow', memory_map=True)
+        except ImportError:
+            pass
+    return apply_schema(pd.read_csv(csv_file), schema)
+
+
+def convert_to_parquet(markets=None):
+    """Write typed Parquet copies of each market's property & demand/supply CSVs"""
+    written = []
+    for market in markets or available_markets():
+        files = market_files(market)
+        for csv_file, parquet_file, schema in [(files['property_csv'], files['property_parquet'], PROPERTY_SCHEMA), (files['ratio_csv'], files['ratio_parquet'], RATIO_SCHEMA)]:
+            if not os.path.exists(csv_file):
+                continue
+            apply_schema(pd.read_csv(csv_file), schema).to_parquet(parquet_file, engine='pyarrow', index=False)
+            written.append(parquet_file)
+    return written
+
+
+def assign_submarkets(property_df, submarket_gdf, chunk_size=SPATIAL_JOIN_CHUNK_SIZE):
+    """Find the submarket polygon containing each property (None for points outside every polygon)"""
+    import shapely
+
+    if submarket_gdf.crs is not None:
+        submarket_gdf = submarket_gdf.to_crs('EPSG:4326')
+    tree = shapely.STRtree(submarket_gdf.geometry.values)
+    names = submarket_gdf['Submarket'].to_numpy(dtype=object)
+    lon = property_df['Longitude'].to_numpy(dtype=float)
+    lat = property_df['Latitude'].to_numpy(dtype=float)
+    polygon_idx = np.full(len(property_df), -1, dtype=np.intp)
+    # Join in chunks, so only one chunk of point geometries is in memory at a time:
+    for start in range(0, len(property_df), chunk_size):
+        points = shapely.points(lon[start:start + chunk_size], lat[start:start + chunk_size])
+        point_idx, matched_idx = tree.query(points, predicate='intersects')
+        # Points on a shared border match several polygons, so keep the first polygon (in file order) for each point:
+        order = np.lexsort((matched_idx, point_idx))
+        point_idx, matched_idx = point_idx[order], matched_idx[order]
+        first = np.unique(point_idx, return_index=True)[1]
+        polygon_idx[start + point_idx[first]] = matched_idx[first]
+    return np.where(polygon_idx >= 0, names[polygon_idx], None)
+
+
+def reconcile_submarkets(property_df, submarket_gdf):
+    """Compare property submarket labels with the polygon each property falls in & record the result in SubmarketCheck"""
+    assigned = assign_submarkets(property_df, submarket_gdf)
+    if 'SubmarketName' in property_df.columns:
+        labels = property_df['SubmarketName'].to_numpy(dtype=object)
+    else:
+        labels = np.full(len(property_df), None, dtype=object)
+    known = pd.Series(labels).isin(set(submarket_gdf['Submarket'])).to_numpy()
+    outside = pd.isna(assigned)
+    status = np.select(
+        [outside, ~known, labels == assigned],
+        ['outside', 'assigned', 'match'],
+        default='mismatch',
+    )
+    # Missing or unknown labels take the submarket of the polygon the property is in (other labels are kept, just flagged):
+    property_df = property_df.copy()
+    property_df['SubmarketName'] = pd.Categorical(np.where(status == 'assigned', assigned, labels))
+    property_df['SubmarketCheck'] = pd.Categorical(status, categories=SUBMARKET_CHECK_STATUSES)
+    return property_df
+
+
+def submarket_check_report(property_df, n_examples=20):
+    """Count properties by submarket check status & pick examples of the problem rows"""
+    counts = property_df['SubmarketCheck'].value_counts().reindex(SUBMARKET_CHECK_STATUSES, fill_value=0)
+    flagged_df = property_df[property_df['SubmarketCheck'].isin(['outside', 'mismatch'])]
+    return {
+        'counts': counts.to_dict(),
+        'examples': flagged_df[['PropertyName', 'SubmarketName', 'SubmarketCheck', 'Latitude', 'Longitude']].head(n_examples),
+    }
+
+
+def build_property_index(df):
+    """Build categorical codes & sorted row offsets for each property filter column"""
+    import shapely
+
+    index = {'n_rows': len(df)}
+    # Spatial index over property coordinates for viewport queries:
+    index['points_tree'] = shapely.STRtree(shapely.points(df['Longitude'].to_numpy(dtype=float), df['Latitude'].to_numpy(dtype=float)))
+    for col in PROPERTY_INDEX_COLUMNS:
+        # Factorize once (missing values get code -1, so they never match a selection):
+        codes, uniques = pd.factorize(df[col])
+        # Stable sort keeps each value's rows in original order, so a value's rows are order[offsets[i]:offsets[i+1]]:
+        order = np.argsort(codes, kind='stable')
+        offsets = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        index[col] = {
+            'codes': codes,
+            'lookup': {value: code for code, value in enumerate(uniques)},
+            'order': order,
+            'offsets': offsets,
+        }
+    return index
+
+
+def index_codes(col_index, values):
+    """Map filter values to their index codes (values not in the data are dropped)"""
+    return np.array([col_index['lookup'][v] for v in values if v in col_index['lookup']], dtype=np.intp)
+
+
+def index_rows(col_index, values):
+    """Get sorted row positions for all rows matching any of the given values"""
+    codes = index_codes(col_index, values)
+    order, offsets = col_index['order'], col_index['offsets']
+    if len(codes) == 0:
+        return np.empty(0, dtype=np.intp)
+    if len(codes) == 1:
+        return order[offsets[codes[0]]:offsets[codes[0] + 1]]
+    return np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in codes]))
+
+
+def filter_property_data(df, data_type, date_ranges, submarket, index=None, bounds=None, date_window=None, time_index=None):
+    """Filter property data based on user selections (& optionally a (south, west, north, east) viewport; a (first, last) month date_window replaces the date ranges)"""
+    if date_window is not None and time_index is not None and time_index['n_rows'] == len(df):
+        return filter_property_window(df, time_index, data_type, date_window, submarket, bounds)
+    if date_window is None and index is not None and index['n_rows'] == len(df):
+        return filter_property_data_indexed(df, index, data_type, date_ranges, submarket, bounds)
     filtered_df = df.copy()
-    # Filter by date ranges:
-    if data_type == 'Construction Starts':
+    # Filter by date window or date ranges:
+    if date_window is not None:
+        months = property_months(filtered_df, data_type)
+        filtered_df = filtered_df[(months >= date_window[0]) & (months <= date_window[1])]
+    elif data_type == 'Construction Starts':
         filtered_df = filtered_df[filtered_df['Start_year_range'].isin(date_ranges)]
     elif data_type == 'Construction Deliveries':
         filtered_df = filtered_df[filtered_df['Completion_year_range'].isin(date_ranges)]
     # Filter by submarket
     if submarket != 'All':
         filtered_df = filtered_df[filtered_df['SubmarketName'] == submarket]
+    # Filter by viewport:
+    if bounds is not None:
+        filtered_df = filter_viewport(filtered_df, bounds)
     
     return filtered_df
 
 
-def filter_ratio_data(df, date_ranges, submarket):
+def filter_viewport(df, bounds):
+    """Keep the properties inside a (south, west, north, east) viewport"""
+    south, west, north, east = bounds
+    in_view = df['Latitude'].between(south, north) & df['Longitude'].between(west, east)
+    return df if in_view.all() else df[in_view]
+
+
+def viewport_rows(index, bounds):
+    """Get sorted row positions of the properties inside a (south, west, north, east) viewport from the spatial index"""
+    import shapely
+
+    south, west, north, east = bounds
+    return np.sort(index['points_tree'].query(shapely.box(west, south, east, north)))
+
+
+def filter_property_data_indexed(df, index, data_type, date_ranges, submarket, bounds=None):
+    """Filter property data using the prebuilt index (no full-table copy or string scans)"""
+    rows = None  # None = every row
+    # Filter by submarket first (its rows are usually the smallest set):
+    if submarket != 'All':
+        rows = index_rows(index['SubmarketName'], [submarket])
+    # Filter by viewport:
+    if bounds is not None:
+        in_view = viewport_rows(index, bounds)
+        rows = in_view if rows is None else np.intersect1d(rows, in_view, assume_unique=True)
+    # Filter by date ranges:
+    date_col = DATE_RANGE_COLUMNS.get(data_type)
+    if date_col is not None:
+        if rows is None:
+            rows = index_rows(index[date_col], date_ranges)
+        else:
+            rows = rows[np.isin(index[date_col]['codes'][rows], index_codes(index[date_col], date_ranges))]
+    # Nothing filtered out, hand back the original frame without copying:
+    if rows is None or len(rows) == len(df):
+        return df
+    return df.take(rows)
+
+
+def update_supply_cube(cube, df, removed_df, added_df):
+    """Apply removed & added property rows to a copy of the supply cube (None when the submarkets or date ranges of df changed, which needs a rebuild)"""
+    submarkets = sorted(df['SubmarketName'].dropna().unique().tolist())
+    if submarkets != cube['submarkets']:
+        return None
+    # Unlabeled properties sit in the last row:
+    row_lookup = {**cube['submarket_lookup'], UNLABELED_SUBMARKET: len(submarkets)}
+    new_cube = {'submarkets': cube['submarkets'], 'submarket_lookup': cube['submarket_lookup']}
+    for data_type, date_col in DATE_RANGE_COLUMNS.items():
+        data_cube = cube[data_type]
+        if sorted(df[date_col].dropna().unique().tolist()) != data_cube['date_ranges']:
+            return None
+        units, properties, unit_properties = data_cube['units'].copy(), data_cube['properties'].copy(), data_cube['unit_properties'].copy()
+        for changed_df, sign in [(removed_df, -1), (added_df, 1)]:
+            changed_df = changed_df[changed_df[date_col].notna()]
+            rows = changed_df['SubmarketName'].astype(object).fillna(UNLABELED_SUBMARKET).map(row_lookup).to_numpy(dtype=np.intp)
+            cols = changed_df[date_col].astype(object).map(data_cube['date_range_lookup']).to_numpy(dtype=np.intp)
+            np.add.at(units, (rows, cols), sign * changed_df['UnitCount'].to_numpy(dtype=np.int64, na_value=0))
+            np.add.at(properties, (rows, cols), sign)
+            np.add.at(unit_properties, (rows, cols), sign * changed_df['UnitCount'].notna().to_numpy(dtype=np.int64))
+        new_cube[data_type] = {**data_cube, 'units': units, 'properties': properties, 'unit_properties': unit_properties}
+    return new_cube
+
+
+def build_supply_cube(df):
+    """Aggregate unit & property counts into submarket x date range cubes for starts and deliveries"""
+    submarkets = sorted(df['SubmarketName'].dropna().unique().tolist())
+    cube = {'submarkets': submarkets, 'submarket_lookup': {name: i for i, name in enumerate(submarkets)}}
+    # Properties without a submarket still count towards 'All', so they get their own (unnamed) last row:
+    submarket_keys = df['SubmarketName'].astype(object).fillna(UNLABELED_SUBMARKET)
+    for data_type, date_col in DATE_RANGE_COLUMNS.items():
+        date_ranges = sorted(df[date_col].dropna().unique().tolist())
+        # Rows with a missing date range drop out of the groupby, same as the old notna() masks (blank unit counts add no units but still count as properties):
+        grouped = df.groupby([submarket_keys, df[date_col]], observed=True)['UnitCount'].agg(['sum', 'size', 'count'])
+        cells = grouped.unstack(fill_value=0).reindex(index=submarkets + [UNLABELED_SUBMARKET], fill_value=0)
+        cube[data_type] = {
+            'date_ranges': date_ranges,
+            'date_range_lookup': {value: i for i, value in enumerate(date_ranges)},
+            'units': cells['sum'].reindex(columns=date_ranges, fill_value=0).to_numpy(dtype=np.int64),
+            'properties': cells['size'].reindex(columns=date_ranges, fill_value=0).to_numpy(dtype=np.int64),
+            # Properties with a unit count, which average units are taken over:
+            'unit_properties': cells['count'].reindex(columns=date_ranges, fill_value=0).to_numpy(dtype=np.int64),
+        }
+    return cube
+
+
+def supply_cube_stats(cube, data_type, date_ranges, submarket):
+    """Look up selection totals & the pct of avg historical volume (unit_ratio) from the supply cube"""
+    data_cube = cube[data_type]
+    # Select submarket rows (an unknown submarket selects nothing):
+    if submarket == 'All':
+        rows = slice(None)
+    else:
+        rows = [cube['submarket_lookup'][submarket]] if submarket in cube['submarket_lookup'] else []
+    cols = [data_cube['date_range_lookup'][d] for d in set(date_ranges) if d in data_cube['date_range_lookup']]
+    submarket_units = data_cube['units'][rows]
+    selected_units = submarket_units[:, cols]
+    selected_properties = data_cube['properties'][rows][:, cols]
+    selected_unit_properties = data_cube['unit_properties'][rows][:, cols].sum()
+
+    total_units = selected_units.sum()
+    total_properties = selected_properties.sum()
+    # Number of selected date ranges that actually have properties, out of all date ranges with data:
+    date_range_count = int((selected_properties.sum(axis=0) > 0).sum())
+    hist_date_range_count = len(data_cube['date_ranges'])
+    # Average units for this many date ranges, e.g. typically in one 2-year period (or 2, 3, etc), how many units are delivered/started in the submarket(s)?
+    avg_submarket_units = submarket_units.sum() * (date_range_count / hist_date_range_count) if hist_date_range_count else 0
+    return {
+        'total_properties': int(total_properties),
+        'total_units': int(total_units),
+        # Blank unit counts are left out of the average, like UnitCount.mean():
+        'avg_units': total_units / selected_unit_properties if selected_unit_properties else np.nan,
+        'unit_ratio': total_units / avg_submarket_units if avg_submarket_units else np.nan,
+    }
+
+
+def property_months(df, data_type):
+    """Month number (year * 12 + month - 1) each property started or completed in (-1 when unknown)"""
+    if data_type == 'Construction Starts':
+        start_dates = df['StartDate']
+        if not pd.api.types.is_datetime64_any_dtype(start_dates):
+            start_dates = pd.to_datetime(start_dates, errors='coerce')
+        months = start_dates.dt.year * 12 + start_dates.dt.month - 1
+        # Properties without a start date have an imputed (fractional) start year instead:
+        start_years = df['Year Started/Expected'].astype(float)
+        imputed = np.floor(start_years) * 12 + np.floor((start_years % 1) * 12)
+        months = months.astype(float).fillna(imputed)
+    else:
+        months = df['Year Completed/Expected'].astype(float) * 12
+    return months.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def month_label(month, step_months=1):
+    """Label a month number as YYYY-MM (or just YYYY for yearly steps)"""
+    return f"{month // 12}" if step_months == 12 else f"{month // 12}-{month % 12 + 1:02d}"
+
+
+def build_time_index(df, submarkets):
+    """Place properties on a monthly time line with per-submarket cumulative unit & property counts, so any date window sums in O(1)"""
+    lookup = {name: i for i, name in enumerate(submarkets)}
+    # Rows: submarkets, then unlabeled properties, then 'All':
+    submarket_codes = df['SubmarketName'].astype(object).map(lookup).fillna(len(submarkets)).to_numpy(dtype=np.intp)
+    unit_counts = df['UnitCount'].to_numpy(dtype=np.int64, na_value=0)
+    has_units = df['UnitCount'].notna().to_numpy(dtype=np.int64)
+    time_index = {'n_rows': len(df), 'submarket_lookup': lookup}
+    for data_type, step_months in TIME_INDEX_STEP_MONTHS.items():
+        months = property_months(df, data_type)
+        dated_rows = np.flatnonzero(months >= 0)
+        if len(dated_rows) == 0:
+            first_month, n_months = 0, 0
+        else:
+            # The time line covers whole steps, e.g. through December of the last completion year:
+            first_month = int(months[dated_rows].min())
+            n_months = int(months[dated_rows].max()) + step_months - first_month
+        columns = months[dated_rows] - first_month
+        units = np.zeros((len(submarkets) + 2, n_months), dtype=np.int64)
+        properties = np.zeros((len(submarkets) + 2, n_months), dtype=np.int64)
+        unit_properties = np.zeros((len(submarkets) + 2, n_months), dtype=np.int64)
+        np.add.at(units, (submarket_codes[dated_rows], columns), unit_counts[dated_rows])
+        np.add.at(properties, (submarket_codes[dated_rows], columns), 1)
+        np.add.at(unit_properties, (submarket_codes[dated_rows], columns), has_units[dated_rows])
+        units[-1], properties[-1], unit_properties[-1] = units[:-1].sum(axis=0), properties[:-1].sum(axis=0), unit_properties[:-1].sum(axis=0)
+        # Leading zero column, so a window's total is cum[:, last + 1] - cum[:, first]:
+        cum_units = np.concatenate([np.zeros((len(units), 1), dtype=np.int64), units.cumsum(axis=1)], axis=1)
+        cum_properties = np.concatenate([np.zeros((len(properties), 1), dtype=np.int64), properties.cumsum(axis=1)], axis=1)
+        cum_unit_properties = np.concatenate([np.zeros((len(unit_properties), 1), dtype=np.int64), unit_properties.cumsum(axis=1)], axis=1)
+        # Row positions sorted by submarket & month (and by month alone for 'All'), so a window's rows are one slice:
+        order = dated_rows[np.lexsort((columns, submarket_codes[dated_rows]))]
+        all_order = dated_rows[np.argsort(columns, kind='stable')]
+        time_index[data_type] = {
+            'first_month': first_month,
+            'n_months': n_months,
+            'step_months': step_months,
+            'cum_units': cum_units,
+            'cum_properties': cum_properties,
+            # Properties with a unit count, which average units are taken over:
+            'cum_unit_properties': cum_unit_properties,
+            'order': order,
+            'all_order': all_order,
+            # Where each submarket's rows start in order:
+            'row_starts': np.concatenate([[0], cum_properties[:-2, -1].cumsum()]),
+        }
+    return time_index
+
+
+def window_columns(data_index, date_window):
+    """Clip a (first, last) month window to the time line (returns first & last column, or None when nothing overlaps)"""
+    first = max(date_window[0] - data_index['first_month'], 0)
+    last = min(date_window[1] - data_index['first_month'], data_index['n_months'] - 1)
+    return (first, last) if first <= last else None
+
+
+def time_index_row(time_index, submarket):
+    """Time index row for a submarket selection (None for unknown submarkets)"""
+    if submarket == 'All':
+        return -1
+    return time_index['submarket_lookup'].get(submarket)
+
+
+def time_index_stats(time_index, data_type, date_window, submarket):
+    """Look up window totals & the pct of avg historical volume (unit_ratio) from the cumulative counts"""
+    data_index = time_index[data_type]
+    row = time_index_row(time_index, submarket)
+    columns = window_columns(data_index, date_window)
+    if row is None or columns is None:
+        total_units = total_properties = unit_properties = window_months = 0
+    else:
+        first, last = columns
+        total_units = data_index['cum_units'][row, last + 1] - data_index['cum_units'][row, first]
+        total_properties = data_index['cum_properties'][row, last + 1] - data_index['cum_properties'][row, first]
+        unit_properties = data_index['cum_unit_properties'][row, last + 1] - data_index['cum_unit_properties'][row, first]
+        window_months = last - first + 1
+    # Average units over a window this long, e.g. typically in 18 months, how many units are delivered/started in the submarket(s)?
+    history_units = data_index['cum_units'][row, -1] if row is not None else 0
+    avg_submarket_units = history_units * window_months / data_index['n_months'] if data_index['n_months'] else 0
+    return {
+        'total_properties': int(total_properties),
+        'total_units': int(total_units),
+        'avg_units': total_units / unit_properties if unit_properties else np.nan,
+        'unit_ratio': total_units / avg_submarket_units if avg_submarket_units else np.nan,
+    }
+
+
+def filter_property_window(df, time_index, data_type, date_window, submarket, bounds=None):
+    """Filter property data to a date window using the time index slices (no date or string scans)"""
+    data_index = time_index[data_type]
+    row = time_index_row(time_index, submarket)
+    columns = window_columns(data_index, date_window)
+    if row is None or columns is None:
+        return df.iloc[:0]
+    first, last = columns
+    cum_properties = data_index['cum_properties'][row]
+    if row == -1:
+        rows = data_index['all_order'][cum_properties[first]:cum_properties[last + 1]]
+    else:
+        start = data_index['row_starts'][row]
+        rows = data_index['order'][start + cum_properties[first]:start + cum_properties[last + 1]]
+    filtered_df = df.take(np.sort(rows))
+    # Filter by viewport:
+    if bounds is not None:
+        filtered_df = filter_viewport(filtered_df, bounds)
+    return filtered_df
+
+
+def build_ratio_cube(df):
+    """Store Demand & Supply as dense submarket x period arrays with cumulative sums over periods"""
+    submarkets = sorted(df['SubmarketName'].dropna().unique().tolist())
+    periods = sorted(df['year_range'].dropna().unique().tolist())
+    cells = df.groupby(['SubmarketName', 'year_range'], observed=True).agg(Demand=('Demand', 'sum'), Supply=('Supply', 'sum'), Rows=('Demand', 'size'))
+    cube = {
+        'submarkets': np.array(submarkets, dtype=object),
+        'submarket_lookup': {name: i for i, name in enumerate(submarkets)},
+        'periods': periods,
+        'period_lookup': {value: i for i, value in enumerate(periods)},
+    }
+    for col, key in [('Demand', 'demand'), ('Supply', 'supply'), ('Rows', 'rows')]:
+        dense = cells[col].unstack(fill_value=0).reindex(index=submarkets, columns=periods, fill_value=0).to_numpy(dtype=float)
+        # cum[:, j] holds the sum of periods 0..j-1, so any run of periods i..j sums to cum[:, j+1] - cum[:, i]:
+        cube[key] = np.concatenate([np.zeros((len(submarkets), 1)), dense.cumsum(axis=1)], axis=1)
+    return cube
+
+
+def ratio_cube_sum(cum, runs):
+    """Sum cumulative submarket x period arrays over runs of consecutive periods"""
+    total = np.zeros(cum.shape[0])
+    for start, end in runs:
+        total += cum[:, end + 1] - cum[:, start]
+    return total
+
+
+def period_runs(period_codes):
+    """Group sorted period codes into (start, end) runs of consecutive periods"""
+    runs = []
+    for code in period_codes:
+        if runs and code == runs[-1][1] + 1:
+            runs[-1][1] = code
+        else:
+            runs.append([code, code])
+    return runs
+
+
+def filter_ratio_data(df, date_ranges, submarket, cube=None):
     """Filter ratio data based on user selections"""
+    if cube is not None:
+        return filter_ratio_data_cube(cube, date_ranges, submarket)
     # Filter by date ranges:
     filtered_df = df[df['year_range'].isin(date_ranges)]
     # Filter by submarket:
     if submarket != 'All':
         filtered_df = filtered_df[filtered_df['SubmarketName'] == submarket]
     # Average ratios across all selected date ranges for the given submarket(s):
-    grouped_df = filtered_df.groupby(['SubmarketName']).agg({'Demand':'sum','Supply':'sum'}).reset_index()
+    grouped_df = filtered_df.groupby(['SubmarketName'], observed=True).agg({'Demand':'sum','Supply':'sum'}).reset_index()
     grouped_df['demand_supply_ratio'] = np.where(grouped_df['Supply']>0, grouped_df['Demand']/grouped_df['Supply'], 1)
     
     return grouped_df
 
 
+def filter_ratio_data_cube(cube, date_ranges, submarket):
+    """Build the ratio table for a selection from the ratio cube's cumulative sums (no groupby)"""
+    runs = period_runs(sorted({cube['period_lookup'][d] for d in date_ranges if d in cube['period_lookup']}))
+    rows = ratio_cube_sum(cube['rows'], runs)
+    # Keep submarkets that have data in the selected periods (like groupby would):
+    keep = rows > 0
+    if submarket != 'All':
+        keep &= cube['submarkets'] == submarket
+    demand = ratio_cube_sum(cube['demand'], runs)[keep]
+    supply = ratio_cube_sum(cube['supply'], runs)[keep]
+    grouped_df = pd.DataFrame({'SubmarketName': cube['submarkets'][keep], 'Demand': demand, 'Supply': supply})
+    grouped_df['demand_supply_ratio'] = np.where(supply > 0, demand / np.where(supply > 0, supply, 1), 1)
+
+    return grouped_df
+
+
+def simplify_tolerance(zoom):
+    """Simplification tolerance in degrees (about a quarter of a screen pixel at the given zoom)"""
+    return 360 / (256 * 2**zoom) / 4
+
+
+def coordinate_precision(zoom):
+    """Decimal places needed for coordinates to stay within the simplification tolerance at the given zoom"""
+    return int(np.ceil(-np.log10(simplify_tolerance(zoom))))
+
+
+def simplify_submarkets(geometry, tolerance):
+    """Simplify submarket polygons, keeping shared borders between neighbouring submarkets intact"""
+    try:
+        # Coverage simplification moves shared edges together, so no gaps/overlaps open up between submarkets (needs GEOS 3.12+):
+        return geometry.simplify_coverage(tolerance)
+    except Exception:
+        return geometry.simplify(tolerance, preserve_topology=True)
+
+
+def build_geometry_lods(submarket_gdf):
+    """Build simplified submarket polygons & their GeoJSON features for each zoom level"""
+    lods = {}
+    positions = {}
+    for position, name in enumerate(submarket_gdf['Submarket']):
+        positions.setdefault(name, []).append(position)
+    # Tolerances are in degrees, so reproject before simplifying:
+    if submarket_gdf.crs is not None:
+        submarket_gdf = submarket_gdf.to_crs('EPSG:4326')
+    for zoom in GEOMETRY_LOD_ZOOMS:
+        simplified_gdf = submarket_gdf.copy()
+        simplified_gdf['geometry'] = simplify_submarkets(submarket_gdf.geometry, simplify_tolerance(zoom))
+        # Serialize once, so maps reuse the feature dicts instead of converting the GeoDataFrame on every build:
+        lods[zoom] = {
+            'gdf': simplified_gdf,
+            'features': compact_polygon_features(simplified_gdf, ['Submarket'], coordinate_precision(zoom))['features'],
+            'positions': positions,
+        }
+    return lods
+
+
+def select_geometry_level(lods, zoom):
+    """Pick the coarsest geometry level that is still detailed enough for the map zoom"""
+    for lod_zoom in GEOMETRY_LOD_ZOOMS:
+        if lod_zoom >= zoom:
+            return lods[lod_zoom]
+    return lods[GEOMETRY_LOD_ZOOMS[-1]]
+
+
+def geometry_level_features(level, submarket):
+    """Get a level's GeoJSON FeatureCollection for the selected submarket(s)"""
+    if submarket == 'All':
+        features = level['features']
+    else:
+        features = [level['features'][i] for i in level['positions'].get(submarket, [])]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
 def filter_submarket_gdf(gdf, submarket):
     """Filter submarket geodataframe based on selected submarket"""
     if submarket == 'All':
@@ -97,6 +753,324 @@ def filter_submarket_gdf(gdf, submarket):
 
 
 
+##### DEFINE MARKET DATA STORE #####
+
+
+def build_market(market):
+    """Load one market & build everything looked up for it on reruns (filter index, cubes, simplified polygons, label checks)"""
+    # Note the files' state first, so changes made while loading are picked up by the next refresh:
+    signature = market_signature(market)
+    property_df, ratio_df, submarket_gdf = read_market_tables(market)
+    # Fold in any delta files already waiting:
+    for delta_file in market_delta_files(market, 'property'):
+        property_df = upsert_rows(property_df, read_delta(delta_file, PROPERTY_SCHEMA), PROPERTY_KEY_COLUMNS)
+    for delta_file in market_delta_files(market, 'ratio'):
+        ratio_df = upsert_rows(ratio_df, read_delta(delta_file, RATIO_SCHEMA), RATIO_KEY_COLUMNS)
+    row_hashes = hash_rows(property_df, PROPERTY_SCHEMA)
+    property_df = reconcile_submarkets(property_df, submarket_gdf)
+    supply_cube = build_supply_cube(property_df)
+    geometry_version = geometry_data_version(submarket_gdf)
+    return {
+        'market': market,
+        'version': data_version(row_hashes, ratio_df, geometry_version),
+        # Base maps only change with the polygons, which a refresh never swaps (a new GeoJSON rebuilds the market):
+        'geometry_version': geometry_version,
+        'signature': signature,
+        'row_hashes': row_hashes,
+        'property_df': property_df,
+        'ratio_df': ratio_df,
+        'submarket_gdf': submarket_gdf,
+        'property_index': build_property_index(property_df),
+        'supply_cube': supply_cube,
+        'time_index': build_time_index(property_df, supply_cube['submarkets']),
+        'ratio_cube': build_ratio_cube(ratio_df),
+        'geometry_lods': build_geometry_lods(submarket_gdf),
+        'check_report': submarket_check_report(property_df),
+    }
+
+
+def estimate_market_bytes(obj):
+    """Roughly estimate the memory held by a loaded market's tables, arrays & serialized features"""
+    if isinstance(obj, pd.DataFrame):
+        nbytes = int(obj.memory_usage(deep=True).sum())
+        # Geometry columns only report their pointers, so add 16 bytes per coordinate:
+        if 'geometry' in obj.columns:
+            import shapely
+            nbytes += 16 * int(shapely.get_num_coordinates(np.asarray(obj['geometry'])).sum())
+        return nbytes
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(estimate_market_bytes(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_market_bytes(item) for item in obj)
+    # Spatial trees hold one geometry per property:
+    if hasattr(obj, 'geometries'):
+        return 64 * len(obj.geometries)
+    return 0
+
+
+def market_delta_files(market, table):
+    """List a market's delta files for the 'property' or 'ratio' table, oldest name first"""
+    prefix = f'costar_{market}_property_construction_delta' if table == 'property' else f'costar_{market}_submarket_demand_supply_delta'
+    if not os.path.isdir(DATA_DIR):
+        return []
+    return sorted(os.path.join(DATA_DIR, f) for f in os.listdir(DATA_DIR) if f.startswith(prefix) and f.endswith('.csv'))
+
+
+def market_signature(market):
+    """Modification time & size of each of a market's extract, Parquet & delta files"""
+    signature = {}
+    for file_path in list(market_files(market).values()) + market_delta_files(market, 'property') + market_delta_files(market, 'ratio'):
+        if os.path.exists(file_path):
+            stat = os.stat(file_path)
+            signature[file_path] = (stat.st_mtime, stat.st_size)
+    return signature
+
+
+def geometry_data_version(submarket_gdf):
+    """Version of a market's submarket polygons, hashed from their names & shapes"""
+    import shapely
+
+    digest = hashlib.md5(repr(submarket_gdf['Submarket'].tolist()).encode())
+    for wkb in shapely.to_wkb(np.asarray(submarket_gdf.geometry.values)):
+        digest.update(wkb or b'')
+    return digest.hexdigest()[:12]
+
+
+def data_version(row_hashes, ratio_df, geometry_version):
+    """Version of a market's loaded data, hashed from its rows & polygons (the same data always gets the same version, so maps cached for other data never match)"""
+    digest = hashlib.md5(geometry_version.encode())
+    digest.update(np.sort(row_hashes).tobytes())
+    digest.update(np.sort(hash_rows(ratio_df, RATIO_SCHEMA)).tobytes())
+    return digest.hexdigest()[:12]
+
+
+def read_delta(delta_file, schema):
+    """Read a delta file's rows with the table's schema"""
+    return apply_schema(pd.read_csv(delta_file), schema)
+
+
+def hash_rows(df, schema):
+    """Hash each row's schema columns (equal rows get equal hashes, whatever their row order)"""
+    return pd.util.hash_pandas_object(df[[col for col in schema if col in df.columns]], index=False).to_numpy()
+
+
+def concat_tables(frames):
+    """Stack tables, keeping category columns as categories (over the union of their categories)"""
+    from pandas.api.types import union_categoricals
+
+    frames = [df for df in frames if len(df)] or frames[:1]
+    combined = pd.concat(frames, ignore_index=True)
+    for col, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and not isinstance(combined[col].dtype, pd.CategoricalDtype):
+            combined[col] = union_categoricals([df[col].astype('category') for df in frames], sort_categories=True)
+    return combined
+
+
+def upsert_rows(df, new_df, key_columns):
+    """Replace the rows of df sharing a key with a new row & append the rest"""
+    new_keys = pd.util.hash_pandas_object(new_df[key_columns], index=False).to_numpy()
+    replaced = np.isin(pd.util.hash_pandas_object(df[key_columns], index=False).to_numpy(), new_keys)
+    return concat_tables([df[~replaced], new_df])
+
+
+def refresh_market(market_data):
+    """Bring a loaded market up to date with its files, ingesting only new or changed rows (returns market_data itself when nothing changed)"""
+    market = market_data['market']
+    files = market_files(market)
+    signature = market_signature(market)
+    old_signature = market_data['signature']
+    if signature == old_signature:
+        return market_data
+    changed = lambda file_path: signature.get(file_path) != old_signature.get(file_path)
+    # New polygons change every row's label check & every simplified outline, so the market is rebuilt:
+    if changed(files['geojson']):
+        return build_market(market)
+    # Rows a loaded delta file no longer holds (it was deleted or rewritten) can't be taken back out by upserts, so the market is rebuilt too:
+    loaded_deltas = [f for f in old_signature if f not in files.values()]
+    if any(changed(f) for f in loaded_deltas):
+        return build_market(market)
+    property_df, submarket_gdf = market_data['property_df'], market_data['submarket_gdf']
+    row_hashes = market_data['row_hashes']
+
+    # Property rows: a changed extract is diffed against what is loaded (rows are new, changed or gone by their hash), delta rows replace rows with their key:
+    removed = np.zeros(len(property_df), dtype=bool)
+    added = []
+    extract_changed = changed(files['property_csv']) or changed(files['property_parquet'])
+    if extract_changed:
+        extract_df = read_table(files['property_parquet'], files['property_csv'], PROPERTY_SCHEMA)
+        extract_hashes = hash_rows(extract_df, PROPERTY_SCHEMA)
+        removed |= ~np.isin(row_hashes, extract_hashes)
+        added.append(extract_df[~np.isin(extract_hashes, row_hashes)])
+    for delta_file in market_delta_files(market, 'property'):
+        # The diff above drops loaded delta rows missing from the new extract, so a changed extract gets every delta re-applied (otherwise only new delta files are):
+        if not (extract_changed or changed(delta_file)):
+            continue
+        delta_df = read_delta(delta_file, PROPERTY_SCHEMA)
+        delta_keys = pd.util.hash_pandas_object(delta_df[PROPERTY_KEY_COLUMNS], index=False).to_numpy()
+        removed |= np.isin(pd.util.hash_pandas_object(property_df[PROPERTY_KEY_COLUMNS], index=False).to_numpy(), delta_keys)
+        added = [df[~np.isin(pd.util.hash_pandas_object(df[PROPERTY_KEY_COLUMNS], index=False).to_numpy(), delta_keys)] for df in added]
+        added.append(delta_df)
+
+    refreshed = {**market_data, 'signature': signature}
+    if removed.any() or any(len(df) for df in added):
+        added_raw_df = apply_schema(concat_tables(added), PROPERTY_SCHEMA) if added else property_df.iloc[:0]
+        # Only the new rows need their submarket labels checked:
+        added_df = reconcile_submarkets(added_raw_df, submarket_gdf)
+        removed_df = property_df[removed]
+        property_df = concat_tables([property_df[~removed], added_df])
+        supply_cube = update_supply_cube(market_data['supply_cube'], property_df, removed_df, added_df)
+        if supply_cube is None:
+            supply_cube = build_supply_cube(property_df)
+        refreshed.update({
+            'row_hashes': np.concatenate([row_hashes[~removed], hash_rows(added_raw_df, PROPERTY_SCHEMA)]),
+            'property_df': property_df,
+            # Row positions shift, so the filter index is rebuilt (it is a sort, not a spatial join):
+            'property_index': build_property_index(property_df),
+            'supply_cube': supply_cube,
+            'time_index': build_time_index(property_df, supply_cube['submarkets']),
+            'check_report': submarket_check_report(property_df),
+        })
+
+    # Demand/supply rows (one row per submarket & period, so the cube is simply rebuilt):
+    ratio_deltas = market_delta_files(market, 'ratio')
+    if changed(files['ratio_csv']) or changed(files['ratio_parquet']) or any(changed(f) for f in ratio_deltas):
+        if changed(files['ratio_csv']) or changed(files['ratio_parquet']):
+            ratio_df = read_table(files['ratio_parquet'], files['ratio_csv'], RATIO_SCHEMA)
+            ratio_deltas_to_apply = ratio_deltas
+        else:
+            ratio_df = market_data['ratio_df']
+            ratio_deltas_to_apply = [f for f in ratio_deltas if changed(f)]
+        for delta_file in ratio_deltas_to_apply:
+            ratio_df = upsert_rows(ratio_df, read_delta(delta_file, RATIO_SCHEMA), RATIO_KEY_COLUMNS)
+        refreshed.update({'ratio_df': ratio_df, 'ratio_cube': build_ratio_cube(ratio_df)})
+
+    refreshed['version'] = data_version(refreshed['row_hashes'], refreshed['ratio_df'], refreshed['geometry_version'])
+    return refreshed
+
+
+class MarketStore:
+    """Loaded markets shared read-only across sessions, dropping the least recently used markets past a memory budget"""
+
+    def __init__(self, max_bytes=MARKET_CACHE_MAX_BYTES, loader=build_market, refresher=refresh_market, refresh_seconds=DATA_REFRESH_SECONDS):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.refresher = refresher
+        self.refresh_seconds = refresh_seconds
+        self._markets = OrderedDict()  # market -> [market data, estimated bytes, last file check]
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self.total_bytes = 0
+
+    def _lookup(self, market):
+        """Get a loaded market & mark it recently used (call while holding the lock)"""
+        entry = self._markets.get(market)
+        if entry is None:
+            return None
+        self._markets.move_to_end(market)
+        self.hits += 1
+        return entry[0]
+
+    def _refresh_due(self, market):
+        """Check whether a loaded market is due a file check & claim it (call while holding the lock)"""
+        entry = self._markets.get(market)
+        if entry is None or not self.refresh_seconds or time.monotonic() - entry[2] < self.refresh_seconds:
+            return False
+        entry[2] = time.monotonic()
+        return True
+
+    def refresh(self, market):
+        """Ingest new or changed rows from a loaded market's files, then swap in the updated data (sessions mid-rerun keep the data they started with)"""
+        load_lock = self._load_locks[market]
+        # Another session is already loading or refreshing this market, so keep serving the current data:
+        if not load_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                entry = self._markets.get(market)
+            if entry is None:
+                return
+            market_data = self.refresher(entry[0])
+            if market_data is entry[0]:
+                return
+            nbytes = estimate_market_bytes(market_data)
+            with self._lock:
+                if self._markets.get(market) is entry:
+                    self._markets[market] = [market_data, nbytes, entry[2]]
+                    self.total_bytes += nbytes - entry[1]
+                    self.refreshes += 1
+        finally:
+            load_lock.release()
+
+    def get(self, market):
+        """Get a market's data, loading it on first request (sessions asking for the same market share one load)"""
+        with self._lock:
+            market_data = self._lookup(market)
+            refresh_due = market_data is not None and self._refresh_due(market)
+            load_lock = self._load_locks.setdefault(market, threading.Lock())
+        if market_data is not None:
+            if refresh_due:
+                self.refresh(market)
+                with self._lock:
+                    market_data = self._markets.get(market, [market_data])[0]
+            return market_data
+        with load_lock:
+            # Another session may have loaded it while this one waited:
+            with self._lock:
+                market_data = self._lookup(market)
+            if market_data is not None:
+                return market_data
+            market_data = self.loader(market)
+            nbytes = estimate_market_bytes(market_data)
+            with self._lock:
+                self._markets[market] = [market_data, nbytes, time.monotonic()]
+                self.total_bytes += nbytes
+                self.loads += 1
+                # The market just loaded always stays, even if it alone is over budget:
+                while self.total_bytes > self.max_bytes and len(self._markets) > 1:
+                    _, (_, evicted_bytes, _) = self._markets.popitem(last=False)
+                    self.total_bytes -= evicted_bytes
+                    self.evictions += 1
+        return market_data
+
+    def clear(self):
+        """Drop every loaded market"""
+        with self._lock:
+            self._markets.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """Get the loaded markets & load/hit/eviction counters"""
+        with self._lock:
+            return {
+                'markets': list(self._markets),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'loads': self.loads,
+                'refreshes': self.refreshes,
+                'evictions': self.evictions,
+            }
+
+
+@st.cache_resource
+def get_market_store():
+    """Get the market store shared by all sessions"""
+    return MarketStore()
+
+
+def load_market(market=DEFAULT_MARKET):
+    """Get one market's tables & prebuilt lookups, loading the market on first request"""
+    return get_market_store().get(market)
+
+
+
 ##### DEFINE MAPPING FUNCTIONS #####
 
 
@@ -107,8 +1081,13 @@ def get_map_center(submarket_gdf, submarket):
     default_lat, default_lon, default_zoom = 39.7309, -105, 10   #39.7392, -104.9903
     
     if submarket == 'All':
-        # If showing all submarkets, use overall Denver center:
-        return default_lat, default_lon, default_zoom
+        # If showing all submarkets, fit the view to the market's submarkets:
+        if submarket_gdf.empty or not submarket_gdf['geometry'].notna().any():
+            return default_lat, default_lon, default_zoom
+        if submarket_gdf.crs is not None:
+            submarket_gdf = submarket_gdf.to_crs('EPSG:4326')
+        west, south, east, north = submarket_gdf.total_bounds
+        return float(south + north) / 2, float(west + east) / 2, bounds_zoom(west, south, east, north)
     else:
         # Center on selected submarket polygon:
         if not submarket_gdf.empty:
@@ -122,6 +1101,13 @@ def get_map_center(submarket_gdf, submarket):
             return default_lat, default_lon, 10
 
 
+def bounds_zoom(west, south, east, north, map_pixels=MAP_PIXELS):
+    """Highest whole zoom level at which the bounds fit inside the map (lat span measured in Web Mercator y)"""
+    y_span = abs(np.degrees(np.arcsinh(np.tan(np.radians(north)))) - np.degrees(np.arcsinh(np.tan(np.radians(south)))))
+    span = max(east - west, y_span, 1e-6)
+    return int(np.clip(np.floor(np.log2(360 * map_pixels / 256 / span)), 1, 18))
+
+
 def create_color_scale(values, colormap='RdYlBu_r'):
     """Create color scale for values (blue for low, red for high)"""
     if len(values) == 0:
@@ -136,16 +1122,106 @@ def create_color_scale(values, colormap='RdYlBu_r'):
     # Normalize values to 0-1 range:
     normalized = [(v - min_val) / (max_val - min_val) for v in values]
     
-    # Create color mapping (blue to red):
-    cmap = plt.cm.get_cmap(colormap)
-    colors = cmap(normalized)
-    hex_colors = ['#{:02x}{:02x}{:02x}'.format(int(c[0]*255), int(c[1]*255), int(c[2]*255)) for c in colors]
+    # Create color mapping (blue to red), binning like a 256-color matplotlib colormap:
+    lut = COLORMAPS[colormap]
+    hex_colors = [lut[min(int(v * len(lut)), len(lut) - 1)] for v in normalized]
     
     return hex_colors
 
 
-def create_property_map(property_df, submarket_gdf, data_type, selected_submarket, unit_ratio):
-    """Create folium map with property points and heatmap"""
+def compact_point_features(property_df, fields, precision=COORDINATE_PRECISION):
+    """Build a point FeatureCollection straight from the coordinate columns, keeping only the given fields & rounding coordinates to display precision"""
+    lon = np.round(property_df['Longitude'].to_numpy(dtype=float), precision).tolist()
+    lat = np.round(property_df['Latitude'].to_numpy(dtype=float), precision).tolist()
+    # Plain Python values (None for missing), so the features serialize as they are:
+    columns = [property_df[field].astype(object).where(property_df[field].notna(), None).tolist() for field in fields]
+    features = [
+        {'type': 'Feature', 'id': str(i), 'properties': dict(zip(fields, values)), 'geometry': {'type': 'Point', 'coordinates': [x, y]}}
+        for i, (x, y, *values) in enumerate(zip(lon, lat, *columns))
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def compact_polygon_features(gdf, fields, precision=COORDINATE_PRECISION):
+    """Build a polygon FeatureCollection keeping only the given fields & rounding coordinates to `precision` decimals"""
+    import shapely
+    from shapely.geometry import mapping
+
+    geometry = shapely.transform(np.asarray(gdf.geometry.values), lambda coords: np.round(coords, precision))
+    columns = [gdf[field].astype(object).where(gdf[field].notna(), None).tolist() for field in fields]
+    features = [
+        {'type': 'Feature', 'id': str(i), 'properties': dict(zip(fields, values)), 'geometry': mapping(geom) if geom is not None else None}
+        for i, (geom, *values) in enumerate(zip(geometry, *columns))
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def build_heat_data(property_df, total_units=None, precision=None):
+    """Build [lat, lon, unit share] heatmap triples for all properties at once (optionally rounded to display precision)"""
+    units = property_df['UnitCount'].to_numpy(dtype=float, na_value=0)
+    # Shares are relative to the whole selection, which can be more than the properties passed in (e.g. when culled to the viewport):
+    if total_units is None:
+        total_units = units.sum()
+    # Each property's share of the selection's total units (0 if there are no units):
+    unit_share = units / total_units if total_units > 0 else np.zeros_like(units)
+    lat, lon = property_df['Latitude'].to_numpy(dtype=float), property_df['Longitude'].to_numpy(dtype=float)
+    if precision is not None:
+        lat, lon, unit_share = np.round(lat, precision), np.round(lon, precision), np.round(unit_share, HEAT_WEIGHT_PRECISION)
+    return np.column_stack([lat, lon, unit_share]).tolist()
+
+
+def cluster_properties(property_df, zoom, cell_pixels=CLUSTER_CELL_PIXELS):
+    """Aggregate properties into square grid cells (sized in screen pixels at the given zoom) with summed units"""
+    located_df = property_df[property_df['Latitude'].notna() & property_df['Longitude'].notna()]
+    cell_size = 360 / (256 * 2**zoom) * cell_pixels
+    cells = pd.DataFrame({
+        'cell_x': np.floor(located_df['Longitude'].to_numpy() / cell_size).astype(np.int64),
+        'cell_y': np.floor(located_df['Latitude'].to_numpy() / cell_size).astype(np.int64),
+        'Latitude': located_df['Latitude'].to_numpy(),
+        'Longitude': located_df['Longitude'].to_numpy(),
+        'UnitCount': located_df['UnitCount'].to_numpy(dtype=np.int64, na_value=0),
+    })
+    clusters = cells.groupby(['cell_x', 'cell_y']).agg(
+        Latitude=('Latitude', 'mean'),
+        Longitude=('Longitude', 'mean'),
+        UnitCount=('UnitCount', 'sum'),
+        PropertyCount=('UnitCount', 'size'),
+    )
+    return clusters.reset_index(drop=True)
+
+
+def viewport_window(bounds, zoom):
+    """Snap a st_folium bounds dict outward to whole map tiles plus a one-tile margin, as (south, west, north, east)"""
+    south, west = bounds['_southWest']['lat'], bounds['_southWest']['lng']
+    north, east = bounds['_northEast']['lat'], bounds['_northEast']['lng']
+    if None in (south, west, north, east, zoom):
+        return None
+    # Snapping keeps the window (and its cache key) the same for small pans:
+    tile = 360 / 2**zoom
+    return (
+        round(float((np.floor(south / tile) - 1) * tile), 6),
+        round(float((np.floor(west / tile) - 1) * tile), 6),
+        round(float((np.ceil(north / tile) + 1) * tile), 6),
+        round(float((np.ceil(east / tile) + 1) * tile), 6),
+    )
+
+
+def create_property_map(property_df, submarket_gdf, data_type, selected_submarket, unit_ratio, geometry_lods=None, cluster=True):
+    """Create folium map with property points and heatmap (cluster=False draws every property, e.g. for static exports)"""
+    m = create_property_base_map(submarket_gdf, selected_submarket)
+    zoom = m.options['zoom']
+    # Add submarket outlines, property points & heatmap:
+    outlines = create_submarket_outlines(submarket_gdf, selected_submarket, zoom, geometry_lods=geometry_lods)
+    layer_data = build_property_layer_data(property_df, zoom, cluster=cluster)
+    create_property_layers(layer_data, unit_ratio, outlines=outlines).add_to(m)
+    
+    return m
+
+
+def create_property_base_map(submarket_gdf, selected_submarket):
+    """Create folium map centered on the selected submarket(s), which the outline & property layers are drawn over"""
+    import folium
+
     # Get center coordinates based on selected submarket:
     center_lat, center_lon, zoom_level = get_map_center(submarket_gdf,selected_submarket)
     
@@ -154,42 +1230,83 @@ def create_property_map(property_df, submarket_gdf, data_type, selected_submarke
         zoom_start=zoom_level,
         tiles='CartoDB.Voyager',
     )
-    
-    # Add submarket polygons (light blue, transparent):
-    if st.session_state.tiles:
-        if not submarket_gdf.empty and submarket_gdf['geometry'].notna().any():
-            # for idx, row in submarket_gdf.iterrows():
-                # if row['geometry'] is not None:
-            folium.GeoJson(
-                submarket_gdf,  # row['geometry'],
-                style_function=lambda x: {
-                    'fillColor': 'blue',  #'#ADD8E6',
-                    'color': 'white',  #'#4169E1'
-                    'fillColor': 'blue',
-                    'weight': 2,
-                    'fillOpacity': 0.1
-                },
-                highlight_function= lambda x: {
-                    'fillColor': 'blue',  # Change fill color to blue on hover
-                    'color': 'white',      # Keep border color white
-                    'weight': 5,           # Make border thicker on hover
-                    'fillOpacity': 0     # Make fully transparent on hover (no fill color)
-                },
-                tooltip=folium.GeoJsonTooltip(
-                    fields=['Submarket'], # Show submarket name on hover
-                    aliases=['Submarket:'],
-                    localize=True
-                )
-            ).add_to(m)
-    
-    # Add property coordinate points:
-    if not property_df.empty:
-        # Convert property DataFrame to GeoDataFrame for efficiently display all property points:
-        property_gdf = gpd.GeoDataFrame(property_df, geometry=[Point(xy) for xy in zip(property_df['Longitude'], property_df['Latitude'])],crs='EPSG:4326')
 
+    return m
+
+
+def create_submarket_outlines(submarket_gdf, selected_submarket, zoom, geometry_lods=None):
+    """Create the submarket outline layer (light blue, transparent) from polygons simplified for the map zoom (None when outlines are off)"""
+    import folium
+
+    if not st.session_state.tiles or submarket_gdf.empty or not submarket_gdf['geometry'].notna().any():
+        return None
+    # for idx, row in submarket_gdf.iterrows():
+        # if row['geometry'] is not None:
+    # Use pre-simplified & pre-serialized polygons for this zoom when available:
+    if geometry_lods is not None:
+        submarket_data = geometry_level_features(select_geometry_level(geometry_lods, zoom), selected_submarket)
+    else:
+        submarket_data = compact_polygon_features(submarket_gdf, ['Submarket'])
+    return folium.GeoJson(
+        submarket_data,  # row['geometry'],
+        style_function=lambda x: {
+            'fillColor': 'blue',  #'#ADD8E6',
+            'color': 'white',  #'#4169E1'
+            'fillColor': 'blue',
+            'weight': 2,
+            'fillOpacity': 0.1
+        },
+        highlight_function= lambda x: {
+            'fillColor': 'blue',  # Change fill color to blue on hover
+            'color': 'white',      # Keep border color white
+            'weight': 5,           # Make border thicker on hover
+            'fillOpacity': 0     # Make fully transparent on hover (no fill color)
+        },
+        tooltip=folium.GeoJsonTooltip(
+            fields=['Submarket'], # Show submarket name on hover
+            aliases=['Submarket:'],
+            localize=True
+        )
+    )
+
+
+def build_property_layer_data(property_df, zoom, total_units=None, cluster=True):
+    """Build the property layers' JSON-ready data: point (or cluster, when there are too many to draw) features & heatmap points"""
+    layer_data = {'points': None, 'clusters': None, 'heat_data': None}
+    if property_df.empty:
+        return layer_data
+    # Too many properties to send individually, so aggregate them into clusters sized for the current zoom:
+    clustered = cluster and len(property_df) > MAX_PROPERTY_POINTS
+
+    # Property coordinate points:
+    if not clustered:
+        # Send only the tooltip fields & display-precision coordinates for each property:
+        layer_data['points'] = compact_point_features(property_df, ['PropertyName','UnitCount','SubmarketName'])
+    else:
+        layer_data['clusters'] = compact_point_features(cluster_properties(property_df, zoom), ['PropertyCount','UnitCount'])
+
+    # Create heatmap data:
+    if st.session_state.heatmap:
+        # Use fine clusters in place of individual points when there are too many to send:
+        heat_df = cluster_properties(property_df, zoom, HEAT_CELL_PIXELS) if clustered else property_df
+        layer_data['heat_data'] = build_heat_data(heat_df, total_units, precision=COORDINATE_PRECISION)
+    return layer_data
+
+
+def create_property_layers(layer_data, unit_ratio, outlines=None):
+    """Create feature group with property points (or clusters) and heatmap from their layer data, over the submarket outlines if given"""
+    import folium
+    from folium.plugins import HeatMap
+
+    layers = folium.FeatureGroup(name='Properties')
+    if outlines is not None:
+        outlines.add_to(layers)
+
+    # Add property coordinate points:
+    if layer_data['points'] is not None:
         # Add property points as a GeoJson layer:
         folium.GeoJson(
-            property_gdf,
+            layer_data['points'],
             marker=folium.CircleMarker(
                 radius=5, 
                 weight=1.5, 
@@ -211,51 +1328,97 @@ def create_property_map(property_df, submarket_gdf, data_type, selected_submarke
                 localize=True,
                 style=("background-color:#303030; border-color:black; color:white; font-size:14px; text-align:left;")
             )
-        ).add_to(m)
-        
-        # Create heatmap data:
-        if st.session_state.heatmap:
-            heat_data = []
-            if not property_df.empty:
-                total_units = property_df['UnitCount'].sum()
-            for idx, row in property_df.iterrows():
-                unit_share = row['UnitCount'] / total_units if total_units > 0 else 0
-                heat_data.append([row['Latitude'], row['Longitude'], unit_share])
-            # Adjust gradient to ensure consistent scaling across maps (in down years, we limit the max "heat" of the map based on the ratio of units to that selected submarket(s) avg across time):
-            gradient = {
-                0.0: 'blue',
-                0.2: 'lightblue',
-                0.4: 'cyan',
-                0.6: 'yellow',
-                0.8: 'orange',
-                1.0: 'red'
-            }
-            # If unit_ratio is less than 1, we scale down the max value to prevent overemphasis of heat:
-            if unit_ratio < 1:
-                # Scale down the gradient max value based on unit_ratio:
-                gradient = {k: v for k, v in gradient.items() if k <= unit_ratio}
-            # Adjust the max_val to match the new gradient:
-            max_val = max(gradient.keys())  #* unit_ratio
-
-            # Add heatmap layer
-            if heat_data:
-                HeatMap(
-                    heat_data,
-                    gradient=gradient,
-                    min_opacity=0.5,  #0.2,
-                    max_zoom=15,
-                    radius=20,
-                    blur=10,
-                    max_val=max_val
-                ).add_to(m)
+        ).add_to(layers)
+    elif layer_data['clusters'] is not None:
+        folium.GeoJson(
+            layer_data['clusters'],
+            marker=folium.CircleMarker(
+                radius=5,
+                weight=1.5,
+                fill=True,
+                fillColor='#1e90ff',  # DodgerBlue
+                fillOpacity=0.7,
+                color='white'
+            ),
+            # Bigger circles for clusters with more properties:
+            style_function=lambda x: {'radius': 5 + 2 * np.log2(x['properties']['PropertyCount'])},
+            tooltip=folium.GeoJsonTooltip(
+                fields=['PropertyCount','UnitCount'],
+                aliases=['Properties:','Units:'],
+                localize=True,
+                style=("background-color:#303030; border-color:black; color:white; font-size:14px; text-align:left;")
+            )
+        ).add_to(layers)
+
+    # Add heatmap layer:
+    heat_data = layer_data['heat_data']
+    if heat_data:
+        # Adjust gradient to ensure consistent scaling across maps (in down years, we limit the max "heat" of the map based on the ratio of units to that selected submarket(s) avg across time):
+        gradient = {
+            0.0: 'blue',
+            0.2: 'lightblue',
+            0.4: 'cyan',
+            0.6: 'yellow',
+            0.8: 'orange',
+            1.0: 'red'
+        }
+        # If unit_ratio is less than 1, we scale down the max value to prevent overemphasis of heat:
+        if unit_ratio < 1:
+            # Scale down the gradient max value based on unit_ratio:
+            gradient = {k: v for k, v in gradient.items() if k <= unit_ratio}
+        # Adjust the max_val to match the new gradient:
+        max_val = max(gradient.keys())  #* unit_ratio
+
+        HeatMap(
+            heat_data,
+            gradient=gradient,
+            min_opacity=0.5,  #0.2,
+            max_zoom=15,
+            radius=20,
+            blur=10,
+            max_val=max_val
+        ).add_to(layers)
     
-    return m
+    return layers
+
 
+def build_ratio_data(ratio_df, submarket_gdf, selected_submarket, geometry_lods=None):
+    """Build the ratio layer's GeoJSON: submarket polygons with their ratio & color (None when there is nothing to shade)"""
+    zoom_level = get_map_center(submarket_gdf, selected_submarket)[2]
+    # Shade pre-simplified polygons for this zoom when available:
+    if geometry_lods is not None:
+        level = select_geometry_level(geometry_lods, zoom_level)
+        submarket_gdf = filter_submarket_gdf(level['gdf'], selected_submarket)
+    if ratio_df.empty or submarket_gdf.empty:
+        return None
+    # Merge ratio data with the submarket polygons (only the columns the layer uses):
+    merged_df = submarket_gdf[['Submarket']].merge(ratio_df[['SubmarketName', 'demand_supply_ratio']], left_on='Submarket', right_on='SubmarketName', how='left')
+    merged_df['demand_supply_ratio'] = np.where(merged_df['demand_supply_ratio'].isna(), 1, merged_df['demand_supply_ratio'])  
+    if merged_df.empty:
+        return None
+    # Create color scale for ratios:
+    ratios = merged_df['demand_supply_ratio'].tolist()
+    colors = create_color_scale(ratios)
+
+    # Reuse the level's compact polygons (same order as the filtered level GeoDataFrame), giving each only the fields the layer uses:
+    if geometry_lods is not None:
+        features = geometry_level_features(level, selected_submarket)['features']
+    else:
+        features = compact_polygon_features(submarket_gdf, ['Submarket'])['features']
+    return {'type': 'FeatureCollection', 'features': [
+        {**feature, 'properties': {'Submarket': submarket, 'demand_supply_ratio': ratio, 'color': color}}
+        for feature, submarket, ratio, color in zip(features, merged_df['Submarket'].tolist(), ratios, colors)
+    ]}
+
+
+def create_ratio_map(ratio_df, submarket_gdf, selected_submarket, geometry_lods=None, ratio_data=None):
+    """Create folium map with submarket polygons colored by ratio (ratio_data from build_ratio_data skips rebuilding the layer)"""
+    import folium
 
-def create_ratio_map(ratio_df, submarket_gdf, selected_submarket):
-    """Create folium map with submarket polygons colored by ratio"""
     # Get center coordinates based on selected submarket:
     center_lat, center_lon, zoom_level = get_map_center(submarket_gdf,selected_submarket)
+    if ratio_data is None:
+        ratio_data = build_ratio_data(ratio_df, submarket_gdf, selected_submarket, geometry_lods=geometry_lods)
     
     m = folium.Map( 
         location=[center_lat, center_lon], 
@@ -263,46 +1426,307 @@ def create_ratio_map(ratio_df, submarket_gdf, selected_submarket):
         tiles='CartoDB.Voyager'
     )
     
-    # Add shaded submarket polygons/tiles:
-    if not ratio_df.empty and not submarket_gdf.empty:
-        # Merge ratio data with submarket geodataframe:
-        merged_gdf = submarket_gdf.merge(ratio_df, left_on='Submarket', right_on='SubmarketName', how='left')
-        merged_gdf['demand_supply_ratio'] = np.where(merged_gdf['demand_supply_ratio'].isna(), 1, merged_gdf['demand_supply_ratio'])  
-        if not merged_gdf.empty:
-            # Create color scale for ratios:
-            ratios = merged_gdf['demand_supply_ratio'].tolist()
-            colors = create_color_scale(ratios)
-            merged_gdf['color'] = colors
-            
-            # Add colored submarket polygons:
-            folium.GeoJson(
-                merged_gdf,
-                style_function=lambda x: {
-                    'fillColor': x['properties']['color'],
-                    'color': 'white',
-                    'weight': 2,
-                    'fillOpacity': 0.6
-                },
-                tooltip=folium.GeoJsonTooltip(
-                    fields=['Submarket', 'demand_supply_ratio'],
-                    aliases=['Submarket:', 'Ratio:'],
-                    localize=True,
-                    style=("background-color:#303030; border-color:black; color:white; font-size:14px; text-align:left;")
-                )
-            ).add_to(m)
+    # Add colored submarket polygons/tiles:
+    if ratio_data is not None:
+        folium.GeoJson(
+            ratio_data,
+            style_function=lambda x: {
+                'fillColor': x['properties']['color'],
+                'color': 'white',
+                'weight': 2,
+                'fillOpacity': 0.6
+            },
+            tooltip=folium.GeoJsonTooltip(
+                fields=['Submarket', 'demand_supply_ratio'],
+                aliases=['Submarket:', 'Ratio:'],
+                localize=True,
+                style=("background-color:#303030; border-color:black; color:white; font-size:14px; text-align:left;")
+            )
+        ).add_to(m)
     
     return m
 
 
 
+##### DEFINE MAP CACHE #####
+
+
+class MapCache:
+    """Bounded LRU cache of map layer data (JSON-ready GeoJSON & heatmap points), keyed by filter state
+
+    Only this data is shared across sessions: each rerun wraps it in its own folium objects, which st_folium is free to modify while rendering.
+    """
+
+    def __init__(self, max_entries=MAP_CACHE_MAX_ENTRIES, max_bytes=MAP_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (layer data, nbytes), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached layer data for key (marking it most recently used), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, layer_data, nbytes=None):
+        """Store layer data, evicting least recently used entries until within the size & memory limits (returns the data's size)"""
+        if nbytes is None:
+            nbytes = estimate_map_bytes(layer_data)
+        # Maps bigger than the whole budget are not worth caching:
+        if nbytes > self.max_bytes:
+            return nbytes
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (layer_data, nbytes)
+            self.total_bytes += nbytes
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+                self.evictions += 1
+        return nbytes
+
+    def nbytes(self, key):
+        """Get the estimated size of cached layer data (None if it isn't cached, e.g. evicted since it was looked up)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def clear(self):
+        """Drop all cached layer data (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def estimate_map_bytes(layer_data):
+    """Estimate the bytes a map's layer data sends to the browser (its serialized JSON size)"""
+    if layer_data is None:
+        return 0
+    return len(json.dumps(layer_data))
+
+
+def map_cache_key(market, data_version, data_type, date_ranges, submarket, heatmap_on, tiles_on, date_window=None):
+    """Build the map cache key for a filter state (maps built from an older refresh of the data stop matching)"""
+    # Date range order doesn't change the map; heatmap & tile toggles only affect property maps:
+    if data_type not in DATE_RANGE_COLUMNS:
+        heatmap_on = tiles_on = None
+        date_window = None
+    date_key = tuple(sorted(date_ranges)) if date_window is None else ('window',) + tuple(date_window)
+    return (market, data_version, data_type, date_key, submarket, heatmap_on, tiles_on)
+
+
+@st.cache_resource
+def get_map_cache():
+    """Get the cache of whole-selection map layers shared by all sessions"""
+    return MapCache()
+
+
+@st.cache_resource
+def get_viewport_cache():
+    """Get the cache of property layers for each panned/zoomed view, shared by all sessions"""
+    return MapCache(max_entries=VIEWPORT_CACHE_MAX_ENTRIES, max_bytes=VIEWPORT_CACHE_MAX_BYTES)
+
+
+def map_cache_stats():
+    """Get the map & viewport cache counters"""
+    return {'maps': get_map_cache().stats(), 'viewports': get_viewport_cache().stats()}
+
+
+
+##### DEFINE DIAGNOSTICS #####
+
+
+# Reruns from all sessions append to the same timing log:
+TIMING_LOG_LOCK = threading.Lock()
+
+
+@contextmanager
+def timing_span(timings, stage):
+    """Add the seconds spent inside the with-block to timings[stage]"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+def rerun_record(scope, timings, payload_bytes, cache_stats):
+    """Collect a rerun's filter state, stage timings (ms), payload sizes & map/viewport cache counters for the timing log"""
+    return {
+        'timestamp': time.time(),
+        'session_id': st.session_state.session_id,
+        'scope': scope,
+        'market': st.session_state.market,
+        'data_type': st.session_state.data_type,
+        'date_ranges': st.session_state.date_ranges,
+        'date_window': st.session_state.date_window,
+        'submarket': st.session_state.submarket,
+        'timings_ms': {stage: round(seconds * 1e3, 3) for stage, seconds in timings.items()},
+        'payload_bytes': payload_bytes,
+        'map_cache': cache_stats,
+    }
+
+
+def log_rerun(record, log_path=TIMING_LOG_PATH):
+    """Append one rerun's diagnostics to the JSON lines timing log"""
+    if not log_path:
+        return
+    line = json.dumps(record, default=str)
+    with TIMING_LOG_LOCK:
+        with open(log_path, 'a') as f:
+            f.write(line + '\n')
+
+
+def show_diagnostics(timings, payload_bytes, cache_stats, market_stats):
+    """Show this rerun's stage timings, map payload sizes & map/viewport cache counters in the sidebar"""
+    with st.sidebar.expander(label='Diagnostics', expanded=True):
+        st.dataframe(
+            pd.DataFrame({'Stage': list(timings), 'ms': [round(seconds * 1e3, 1) for seconds in timings.values()]}),
+            hide_index=True,
+        )
+        for layer, nbytes in payload_bytes.items():
+            st.caption(f"{layer}: {nbytes/1024:,.0f} KB map payload")
+        st.caption(f"Markets loaded: {', '.join(market_label(m) for m in market_stats['markets'])} ({market_stats['bytes']/1024**2:.1f} MB) · {market_stats['loads']} loads · {market_stats['refreshes']} refreshes · {market_stats['evictions']} evictions")
+        for label, stats in [('Map cache', cache_stats['maps']), ('Viewport cache', cache_stats['viewports'])]:
+            st.caption(f"{label}: {stats['entries']} layers ({stats['bytes']/1024**2:.1f} MB) · {stats['hits']} hits / {stats['misses']} misses · {stats['evictions']} evictions")
+
+
+
+##### DEFINE MAP FRAGMENTS #####
+
+
+@st.fragment
+def show_property_map(base_key, map_key, property_df, property_index, time_index, submarket_gdf, geometry_lods, unit_ratio, total_units, timings, payload_bytes):
+    """Show the property map in its own partial-rerun region, so pan/zoom only redraws the outline & property layers (not the filters, stats & cubes above it)"""
+    from streamlit_folium import st_folium # type:ignore
+
+    # Pan/zoom reruns only this function, so those reruns get timed & logged on their own:
+    map_rerun = not st.session_state.pop('full_rerun', False)
+    if map_rerun:
+        rerun_start = time.perf_counter()
+        timings, payload_bytes = {}, {}
+
+    # The base map only holds the view, so each rerun builds its own (st_folium modifies the maps it renders):
+    base_map = create_property_base_map(submarket_gdf, st.session_state.submarket)
+
+    # Only send properties inside the current map view (once the user has seen this base map, st_folium reports its bounds & zoom):
+    viewport, zoom = None, base_map.options['zoom']
+    map_state = st.session_state.get('folium_map')
+    if map_state and st.session_state.get('map_base_key') == base_key and map_state.get('bounds') and map_state.get('zoom'):
+        zoom = map_state['zoom']
+        viewport = viewport_window(map_state['bounds'], zoom)
+
+    # Build the property layer data (or reuse the data built for this selection & view; panned/zoomed views get their own cache, so they don't push out whole selections):
+    layers_key = map_key + (viewport, zoom)
+    layer_cache = get_map_cache() if viewport is None else get_viewport_cache()
+    layer_data = layer_cache.get(layers_key)
+    if layer_data is None:
+        with timing_span(timings, 'filter'):
+            # Filter property dataset once per selection, then only cut it down to each new view:
+            selection = st.session_state.get('property_selection')
+            if selection is None or selection[0] != map_key[:5]:
+                selected_df = filter_property_data(property_df, st.session_state.data_type, st.session_state.date_ranges, st.session_state.submarket, index=property_index, date_window=st.session_state.date_window, time_index=time_index)
+                # Property tables keep their default RangeIndex, so the selection's labels are its row positions:
+                selection = (map_key[:5], selected_df, selected_df.index.to_numpy())
+                st.session_state.property_selection = selection
+            if viewport is None:
+                filtered_property_df = selection[1]
+            else:
+                # The spatial index finds the properties in view, & only those also in the selection are kept:
+                in_view = np.intersect1d(selection[2], viewport_rows(property_index, viewport), assume_unique=True)
+                filtered_property_df = property_df.take(in_view)
+        with timing_span(timings, 'build_map'):
+            layer_data = build_property_layer_data(filtered_property_df, zoom, total_units=total_units)
+            payload_bytes['property_layers'] = layer_cache.put(layers_key, layer_data)
+    else:
+        payload_bytes['property_layers'] = layer_cache.nbytes(layers_key) or estimate_map_bytes(layer_data)
+
+    # Wrap the shared layer data in this rerun's own folium layers (outlines are part of them, so zooming swaps in polygons simplified for the new zoom):
+    with timing_span(timings, 'build_map'):
+        outlines = create_submarket_outlines(submarket_gdf, st.session_state.submarket, zoom, geometry_lods=geometry_lods)
+        property_layers = create_property_layers(layer_data, unit_ratio, outlines=outlines)
+
+    # Display the map (property layers are added dynamically, so new layers don't reload the base map & reset the view):
+    with timing_span(timings, 'st_folium'):
+        st_folium(
+            base_map, 
+            width=MAP_PIXELS, 
+            height=MAP_PIXELS,
+            key="folium_map",
+            # Only the view matters to the property layers, so clicks & drawings don't trigger reruns:
+            returned_objects=["zoom", "bounds"],
+            feature_group_to_add=property_layers
+            )
+    st.session_state.map_base_key = base_key
+
+    if map_rerun:
+        timings['total'] = time.perf_counter() - rerun_start
+        log_rerun(rerun_record('map', timings, payload_bytes, map_cache_stats()))
+
+
+
 ##### RUN THE MAIN APP #####
 
 
 def main():
-    st.title("Denver Supply Analysis")
+    from streamlit_folium import st_folium # type:ignore
+
+    # Time each stage of this rerun (& note how big the maps sent to the browser are):
+    rerun_start = time.perf_counter()
+    timings, payload_bytes = {}, {}
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex[:12]
+
+    # Market selector (only shown when the data folder holds more than one market):
+    markets = available_markets()
+    if len(markets) > 1:
+        selected_market = st.sidebar.selectbox(
+            label="Select Market:",
+            options=markets,
+            format_func=market_label,
+            index=markets.index(st.session_state.market) if st.session_state.market in markets else 0,
+            key='market_select'
+        )
+        # Update session state:
+        st.session_state.market = selected_market
+    elif st.session_state.market not in markets:
+        st.session_state.market = markets[0]
+
+    st.title(f"{market_label(st.session_state.market)} Supply Analysis")
     
-    # Load data:
-    property_df, ratio_df, submarket_gdf = load_data()
+    # Load data (& the market's prebuilt filter index, cubes & simplified polygons):
+    with timing_span(timings, 'load_data'):
+        market_data = load_market(st.session_state.market)
+    property_df, ratio_df, submarket_gdf = market_data['property_df'], market_data['ratio_df'], market_data['submarket_gdf']
+    property_index = market_data['property_index']
+    supply_cube = market_data['supply_cube']
+    time_index = market_data['time_index']
+    ratio_cube = market_data['ratio_cube']
+    geometry_lods = market_data['geometry_lods']
     
     # Top filter for data type:
     data_type = st.selectbox(
@@ -319,28 +1743,61 @@ def main():
     with st.sidebar.expander(label='Map Settings'):
         heatmap_on = st.toggle("Activate Heatmap", value=True)
         submarket_tiles_on = st.toggle("Activate Submarket Tiles", value=True)
+        diagnostics_on = st.toggle("Show Diagnostics", value=False)
         # heatmap_radius = st.slider("Radius", min_value=5, max_value=50, value=15, step=1)
         # heatmap_blur = st.slider("Blur", min_value=1, max_value=30, value=7, step=1)
     # Update session states:
     st.session_state.heatmap = True if heatmap_on else False
     st.session_state.tiles = True if submarket_tiles_on else False
 
+    # Flag properties whose submarket label doesn't line up with the submarket polygons:
+    check_report = market_data['check_report']
+    n_flagged = check_report['counts']['mismatch'] + check_report['counts']['outside']
+    if n_flagged:
+        with st.sidebar.expander(label=f'Data Checks ({n_flagged:,} flagged)'):
+            st.caption(f"{check_report['counts']['mismatch']:,} properties fall in a different submarket than labeled; {check_report['counts']['outside']:,} fall outside every submarket; {check_report['counts']['assigned']:,} unlabeled properties were assigned by location.")
+            st.dataframe(check_report['examples'], hide_index=True)
+
     st.sidebar.markdown("---")
     st.sidebar.title("Filters") 
 
-    # Date range multiselect:
-    available_date_ranges = ['2018-2020', '2021-2022', '2023-2024', '2025-2026', '2027-2028']
-    selected_date_ranges = st.sidebar.multiselect(
-        label="Select Date Ranges:",
-        options=available_date_ranges,
-        default=st.session_state.date_ranges,
-        key='date_ranges_select'
-    )
-    # Update session state:
-    st.session_state.date_ranges = selected_date_ranges if selected_date_ranges else available_date_ranges
+    # Property data can be filtered to any date window instead of the fixed date ranges (demand/supply ratios only come in the ranges):
+    window_on = False
+    if st.session_state.data_type in DATE_RANGE_COLUMNS:
+        window_on = st.sidebar.toggle("Custom Date Window", value=False, key='date_window_toggle')
+
+    if window_on:
+        # Date window slider (by month for starts, by year for deliveries):
+        data_index = time_index[st.session_state.data_type]
+        step_months = data_index['step_months']
+        window_options = list(range(data_index['first_month'], data_index['first_month'] + data_index['n_months'], step_months))
+        selected_window = st.sidebar.select_slider(
+            label="Select Date Window:",
+            options=window_options,
+            value=(window_options[0], window_options[-1]),
+            format_func=lambda month: month_label(month, step_months),
+            key=f"date_window_select_{st.session_state.data_type}"
+        )
+        # Update session state (the window runs through the end of its last step):
+        st.session_state.date_window = (selected_window[0], selected_window[1] + step_months - 1)
+    else:
+        # Date range multiselect (the ranges each data type's data actually has):
+        if st.session_state.data_type in DATE_RANGE_COLUMNS:
+            available_date_ranges = supply_cube[st.session_state.data_type]['date_ranges']
+        else:
+            available_date_ranges = ratio_cube['periods']
+        selected_date_ranges = st.sidebar.multiselect(
+            label="Select Date Ranges:",
+            options=available_date_ranges,
+            default=[d for d in st.session_state.date_ranges if d in available_date_ranges],
+            key=f"date_ranges_select_{st.session_state.data_type}"
+        )
+        # Update session state:
+        st.session_state.date_ranges = selected_date_ranges if selected_date_ranges else available_date_ranges
+        st.session_state.date_window = None
  
     # Submarket selector:
-    available_submarkets = ['All'] + sorted(property_df['SubmarketName'].unique().tolist())
+    available_submarkets = ['All'] + supply_cube['submarkets']
     selected_submarket = st.sidebar.selectbox(
         label="Select Submarket:",
         options=available_submarkets,
@@ -349,6 +1806,10 @@ def main():
     )
     # Update session state:
     st.session_state.submarket = selected_submarket
+
+    # Look up built maps by the full filter state:
+    map_cache = get_map_cache()
+    map_key = map_cache_key(st.session_state.market, market_data['version'], st.session_state.data_type, st.session_state.date_ranges, st.session_state.submarket, st.session_state.heatmap, st.session_state.tiles, date_window=st.session_state.date_window)
         
     # Display current selections:
     # st.subheader("Current Selections:")
@@ -358,58 +1819,36 @@ def main():
     # st.header("Interactive Map")
         
     if st.session_state.data_type in ['Construction Starts', 'Construction Deliveries']:
-        # Filter property & submarket datasets:
-        filtered_property_df = filter_property_data(property_df, st.session_state.data_type, st.session_state.date_ranges, st.session_state.submarket)
-        filtered_submarket_gdf = filter_submarket_gdf(submarket_gdf, st.session_state.submarket)
-        
         # For heatmap, set max "temperature" value based on the unit count for the selected submarket & date compared to that submarket's average across time:
         # If the selected year range has low unitcounts overall, we limit how "hot" the heatmap can get to reflect that:
-        if st.session_state.data_type == 'Construction Starts':
-            date_col = 'Start_year_range'
-        else:
-            date_col = 'Completion_year_range'
-        hist_date_range_count = len(property_df[property_df[date_col].notna()][date_col].unique()) 
-        date_range_count = len(filtered_property_df[date_col].unique())
-        filtered_submarket_units = filtered_property_df['UnitCount'].sum()
-        if st.session_state.submarket != 'All':
-            # Calculate average unitcount for the selected submarket for the number of date ranges selected (out of a total of 5 date range options):
-            # E.g. typically in one 2-year period (or 2, 3, etc), how many units are delivered/started in the submarket?
-            avg_submarket_units = property_df[(property_df['SubmarketName']==st.session_state.submarket) & (property_df[date_col].notna())]['UnitCount'].sum() * (date_range_count / hist_date_range_count)
-        else:
-            # Calculate average unitcount for all submarkets for the number of date ranges selected (out of a total of 5 date range options):
-            avg_submarket_units = property_df[property_df[date_col].notna()]['UnitCount'].sum() * (date_range_count / hist_date_range_count)
-        # Now, take ratio of current value vs the average for this many date periods (& use this to adjust max "temperature" of the heatmap):
-        unit_ratio = filtered_submarket_units / avg_submarket_units
+        with timing_span(timings, 'unit_ratio'):
+            if st.session_state.date_window is not None:
+                supply_stats = time_index_stats(time_index, st.session_state.data_type, st.session_state.date_window, st.session_state.submarket)
+            else:
+                supply_stats = supply_cube_stats(supply_cube, st.session_state.data_type, st.session_state.date_ranges, st.session_state.submarket)
+            unit_ratio = supply_stats['unit_ratio']
 
-        # Create property map:
-        map_obj = create_property_map(filtered_property_df, filtered_submarket_gdf, st.session_state.data_type, st.session_state.submarket, unit_ratio)
+        # The base map (its center & zoom) only changes with the submarket & its polygons:
+        base_key = ('Property Base Map', st.session_state.market, market_data['geometry_version'], st.session_state.submarket)
+        filtered_submarket_gdf = filter_submarket_gdf(submarket_gdf, st.session_state.submarket)
         
         # Display summary statistics:
-        if not filtered_property_df.empty:
+        if supply_stats['total_properties'] > 0:
             st.markdown("---")
             st.subheader("Summary Statistics")
-            total_properties = len(filtered_property_df)
-            total_units = filtered_property_df['UnitCount'].sum()
-            avg_units = filtered_property_df['UnitCount'].mean()
             col_1, col_2, col_3, col_4 = st.columns(4)
             with col_1:
-                st.metric("Total Properties", f"{total_properties:,}")
+                st.metric("Total Properties", f"{supply_stats['total_properties']:,}")
             with col_2:
-                st.metric("Total Units", f"{total_units:,}")
+                st.metric("Total Units", f"{supply_stats['total_units']:,}")
             with col_3:
-                st.metric("Avg Units per Property", f"{avg_units:.0f}")
+                st.metric("Avg Units per Property", f"{supply_stats['avg_units']:.0f}")
             with col_4:
                 st.metric("Pct of Avg Historical Volume", f"{(unit_ratio*100):.1f}%")
 
-        # Display the map:
-        st_folium(
-            map_obj, 
-            width=700, 
-            height=700,
-            key="folium_map",
-            returned_objects=["center", "bounds", "last_object_clicked", "all_drawings"]
-            # returned_objects=['last_object_clicked']  # This would prevent interactions like zoom, pan, etc from needlessly triggering reruns
-            )
+        # Display the map (pan/zoom only reruns the map itself):
+        st.session_state.full_rerun = True
+        show_property_map(base_key, map_key, property_df, property_index, time_index, filtered_submarket_gdf, geometry_lods, unit_ratio, supply_stats['total_units'], timings, payload_bytes)
         
         # Add description below map:
         st.write(f"**Note: Max \"Temperature\" of the heatmap is adjusted based on how the selected year(s) compare to historical average over all date ranges for the given submarket(s).")
@@ -420,11 +1859,20 @@ def main():
     # Demand vs Supply Ratios: 
     else:  
         # Filter ratio & submarket geo datasets:
-        filtered_ratio_df = filter_ratio_data(ratio_df, st.session_state.date_ranges, st.session_state.submarket)
-        filtered_submarket_gdf = filter_submarket_gdf(submarket_gdf, st.session_state.submarket)
+        with timing_span(timings, 'filter'):
+            filtered_ratio_df = filter_ratio_data(ratio_df, st.session_state.date_ranges, st.session_state.submarket, cube=ratio_cube)
+            filtered_submarket_gdf = filter_submarket_gdf(submarket_gdf, st.session_state.submarket)
 
-        # Create ratio map:
-        map_obj = create_ratio_map(filtered_ratio_df, filtered_submarket_gdf, st.session_state.submarket)
+        # Create ratio map from its layer data (or reuse the data built for this selection):
+        ratio_data = map_cache.get(map_key)
+        with timing_span(timings, 'build_map'):
+            if ratio_data is None:
+                ratio_data = build_ratio_data(filtered_ratio_df, filtered_submarket_gdf, st.session_state.submarket, geometry_lods=geometry_lods)
+                payload_bytes['ratio_map'] = map_cache.put(map_key, ratio_data)
+            else:
+                payload_bytes['ratio_map'] = map_cache.nbytes(map_key) or estimate_map_bytes(ratio_data)
+            # Each rerun wraps the shared data in its own map, which st_folium is free to modify:
+            map_obj = create_ratio_map(filtered_ratio_df, filtered_submarket_gdf, st.session_state.submarket, ratio_data=ratio_data)
         
         # Display ratio statistics:
         if not filtered_ratio_df.empty:
@@ -447,18 +1895,26 @@ def main():
                 st.metric("Submarket Ratio", f"{avg_ratio:.2f}")
 
         # Display the map:
-        st_folium(
-            map_obj, 
-            width=700, 
-            height=700,
-            key="folium_map2",
-            returned_objects=["center", "bounds", "last_object_clicked", "all_drawings"]
-            # returned_objects=['last_object_clicked']  # This would prevent interactions like zoom, pan, etc from needlessly triggering reruns
-            )
+        with timing_span(timings, 'st_folium'):
+            st_folium(
+                map_obj, 
+                width=MAP_PIXELS, 
+                height=MAP_PIXELS,
+                key="folium_map2",
+                # Nothing on the ratio map depends on the view, so pan/zoom/clicks don't trigger reruns:
+                returned_objects=[]
+                )
         
         # Add description below map:
         st.write(f"**Red-er values mean greater demand; blue-er mean greater supply.")
 
+    # Record this rerun's timings:
+    timings['total'] = time.perf_counter() - rerun_start
+    cache_stats = map_cache_stats()
+    log_rerun(rerun_record('full', timings, payload_bytes, cache_stats))
+    if diagnostics_on:
+        show_diagnostics(timings, payload_bytes, cache_stats, get_market_store().stats())
+
 
 if __name__ == "__main__":
     main()
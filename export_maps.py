@@ -0,0 +1,136 @@
+"""Export static HTML maps & summary metrics for every submarket x date range selection of each data type
+
+Usage: python export_maps.py [--market denver] [--output exports] [--workers N] [--combinations] [--no-heatmap] [--no-tiles]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import denver_supply_app as app
+
+
+DATA_TYPES = ['Construction Starts', 'Construction Deliveries', 'Demand vs Supply Ratio']
+
+# Each worker process loads the market once & keeps it here for all the selections it exports:
+worker_data = None
+worker_settings = None
+
+
+def init_worker(market, output_dir, heatmap_on, tiles_on):
+    """Load the market & set the map toggles once per worker process"""
+    global worker_data, worker_settings
+    # Map builders read the toggles from session state, as in the app:
+    app.st.session_state.heatmap = heatmap_on
+    app.st.session_state.tiles = tiles_on
+    worker_data = app.load_market(market)
+    worker_settings = {'market': market, 'output_dir': output_dir}
+
+
+def slug(text):
+    """File-name-safe version of a label"""
+    return re.sub(r'[^A-Za-z0-9]+', '_', text).strip('_').lower()
+
+
+def date_range_selections(date_ranges, combinations=False):
+    """Date range selections to export: each range on its own plus all of them (or every non-empty combination)"""
+    if combinations:
+        return [list(combo) for size in range(1, len(date_ranges) + 1) for combo in itertools.combinations(date_ranges, size)]
+    return [[date_range] for date_range in date_ranges] + [list(date_ranges)]
+
+
+def export_selection(selection):
+    """Render one data type x submarket x date range selection to HTML & return its summary metrics"""
+    data_type, submarket, date_ranges = selection
+    property_df, ratio_df, submarket_gdf = worker_data['property_df'], worker_data['ratio_df'], worker_data['submarket_gdf']
+    filtered_submarket_gdf = app.filter_submarket_gdf(submarket_gdf, submarket)
+    metrics = {
+        'market': worker_settings['market'],
+        'data_type': data_type,
+        'submarket': submarket,
+        'date_ranges': '+'.join(date_ranges),
+    }
+
+    if data_type in app.DATE_RANGE_COLUMNS:
+        supply_stats = app.supply_cube_stats(worker_data['supply_cube'], data_type, date_ranges, submarket)
+        filtered_property_df = app.filter_property_data(property_df, data_type, date_ranges, submarket, index=worker_data['property_index'])
+        # Static maps can't re-cluster on zoom, so every property is drawn:
+        map_obj = app.create_property_map(filtered_property_df, filtered_submarket_gdf, data_type, submarket, supply_stats['unit_ratio'], geometry_lods=worker_data['geometry_lods'], cluster=False)
+        metrics.update({
+            'total_properties': supply_stats['total_properties'],
+            'total_units': supply_stats['total_units'],
+            'avg_units': supply_stats['avg_units'],
+            'pct_of_avg_historical_volume': supply_stats['unit_ratio'] * 100,
+        })
+    else:
+        filtered_ratio_df = app.filter_ratio_data(ratio_df, date_ranges, submarket, cube=worker_data['ratio_cube'])
+        map_obj = app.create_ratio_map(filtered_ratio_df, filtered_submarket_gdf, submarket, geometry_lods=worker_data['geometry_lods'])
+        ratios = filtered_ratio_df['demand_supply_ratio']
+        metrics.update({'avg_ratio': ratios.mean(), 'min_ratio': ratios.min(), 'max_ratio': ratios.max()})
+
+    html_dir = os.path.join(worker_settings['output_dir'], slug(data_type), slug(submarket))
+    os.makedirs(html_dir, exist_ok=True)
+    html_file = os.path.join(html_dir, f"{slug(metrics['date_ranges'])}.html")
+    map_obj.save(html_file)
+    metrics['html_file'] = os.path.relpath(html_file, worker_settings['output_dir'])
+    return metrics
+
+
+def export_market(market, output_dir, workers=None, combinations=False, heatmap_on=True, tiles_on=True):
+    """Export every selection of a market over a pool of worker processes & write the metrics as CSV & JSON"""
+    output_dir = os.path.join(output_dir, market)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # The parent only needs the submarket & date range lists (each data type has its own ranges; ratios have periods):
+    market_data = app.load_market(market)
+    supply_cube = market_data['supply_cube']
+    date_ranges = {data_type: supply_cube[data_type]['date_ranges'] for data_type in app.DATE_RANGE_COLUMNS}
+    date_ranges['Demand vs Supply Ratio'] = market_data['ratio_cube']['periods']
+    selections = [
+        (data_type, submarket, selected_ranges)
+        for data_type in DATA_TYPES
+        for submarket in ['All'] + supply_cube['submarkets']
+        for selected_ranges in date_range_selections(date_ranges[data_type], combinations)
+    ]
+
+    init_args = (market, output_dir, heatmap_on, tiles_on)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        init_worker(*init_args)
+        results = [export_selection(selection) for selection in selections]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=init_args) as pool:
+            results = list(pool.map(export_selection, selections, chunksize=max(1, len(selections) // (workers * 4))))
+
+    metrics_df = pd.DataFrame(results)
+    # Counts stay integers even though ratio rows leave them blank:
+    metrics_df = metrics_df.astype({col: 'Int64' for col in ['total_properties', 'total_units'] if col in metrics_df.columns})
+    metrics_df.to_csv(os.path.join(output_dir, 'metrics.csv'), index=False)
+    with open(os.path.join(output_dir, 'metrics.json'), 'w') as f:
+        json.dump(json.loads(metrics_df.to_json(orient='records')), f, indent=2)
+    return metrics_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--market', nargs='+', default=[app.DEFAULT_MARKET], help="market(s) to export, or 'all'")
+    parser.add_argument('--output', default='exports')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('--combinations', action='store_true', help='export every combination of date ranges, not just each range & all ranges')
+    parser.add_argument('--no-heatmap', action='store_true')
+    parser.add_argument('--no-tiles', action='store_true')
+    args = parser.parse_args()
+
+    markets = app.available_markets() if args.market == ['all'] else args.market
+    for market in markets:
+        metrics_df = export_market(market, args.output, args.workers, args.combinations, not args.no_heatmap, not args.no_tiles)
+        print(f"Exported {len(metrics_df)} maps for {app.market_label(market)} to {os.path.join(args.output, market)}")
+
+
+if __name__ == "__main__":
+    main()
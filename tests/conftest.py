@@ -0,0 +1,38 @@
+"""Shared fixtures: a synthetic market written to a temporary data folder the app reads from"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import denver_supply_app as app
+from tests.synthetic import submarket_names, write_dataset
+
+
+# Properties in the synthetic market (enough for the refresh tests' delta & extract changes):
+N_PROPERTIES = 3_000
+
+# A whole market, one submarket & a name with no properties:
+SUBMARKETS = ['All', submarket_names(19)[3], 'Not A Submarket']
+
+
+@pytest.fixture
+def market_dir(tmp_path, monkeypatch):
+    """Synthetic market data folder (some unit counts left blank, as in real extracts), with the app reading from it"""
+    write_dataset(str(tmp_path), N_PROPERTIES)
+    property_csv = tmp_path / 'data' / 'costar_denver_property_construction.csv'
+    property_df = pd.read_csv(property_csv)
+    property_df.loc[::11, 'UnitCount'] = np.nan
+    property_df.to_csv(property_csv, index=False)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def market_data(market_dir):
+    """The synthetic market loaded from scratch"""
+    return app.build_market(app.DEFAULT_MARKET)
+
+
+@pytest.fixture
+def submarkets():
+    return SUBMARKETS
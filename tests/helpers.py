@@ -0,0 +1,70 @@
+"""Reference code & data changes shared by the tests & benchmarks"""
+
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import Point
+
+import denver_supply_app as app
+from tests.synthetic import make_property_df
+
+
+def heat_data_rowwise(property_df):
+    """Original iterrows() heatmap construction from create_property_map"""
+    heat_data = []
+    total_units = property_df['UnitCount'].sum()
+    for idx, row in property_df.iterrows():
+        unit_share = row['UnitCount'] / total_units if total_units > 0 else 0
+        heat_data.append([row['Latitude'], row['Longitude'], unit_share])
+    return heat_data
+
+
+def property_gdf_rowwise(property_df):
+    """Original list-of-Points GeoDataFrame construction from create_property_map"""
+    return gpd.GeoDataFrame(property_df, geometry=[Point(xy) for xy in zip(property_df['Longitude'], property_df['Latitude'])], crs='EPSG:4326')
+
+
+# Fields the property point tooltip shows:
+TOOLTIP_FIELDS = ['PropertyName', 'UnitCount', 'SubmarketName']
+
+
+def points_json_rowwise(property_df):
+    """Original point layer payload: every column of the row-wise GeoDataFrame"""
+    return property_gdf_rowwise(property_df).to_json()
+
+
+def points_json_compact(property_df):
+    """Compact point layer payload: tooltip fields only, coordinates at display precision"""
+    return json.dumps(app.compact_point_features(property_df, TOOLTIP_FIELDS))
+
+
+# Rows in the weekly delta file (half replace existing properties, half are new):
+DELTA_ROWS = 500
+
+
+def check_same(refreshed, rebuilt):
+    """The refreshed market must hold the same rows & aggregates as one rebuilt from scratch"""
+    assert sorted(refreshed['row_hashes']) == sorted(rebuilt['row_hashes'])
+    for data_type in app.DATE_RANGE_COLUMNS:
+        for counts in ['units', 'properties']:
+            assert np.array_equal(refreshed['supply_cube'][data_type][counts], rebuilt['supply_cube'][data_type][counts])
+    assert refreshed['check_report']['counts'] == rebuilt['check_report']['counts']
+
+
+def write_delta(market_data, n):
+    """Weekly drop: change some existing properties & add new ones"""
+    delta_df = market_data['property_df'].head(DELTA_ROWS // 2).drop(columns='SubmarketCheck').copy()
+    delta_df['UnitCount'] += 10
+    delta_df = app.concat_tables([delta_df, make_property_df(DELTA_ROWS // 2, seed=n)])
+    delta_df.to_csv(os.path.join(app.DATA_DIR, f'costar_{app.DEFAULT_MARKET}_property_construction_delta_001.csv'), index=False)
+
+
+def rewrite_extract():
+    """Monthly extract: drop some properties & change others, leaving the delta file in place"""
+    extract_file = app.market_files(app.DEFAULT_MARKET)['property_csv']
+    extract_df = pd.read_csv(extract_file).iloc[DELTA_ROWS:]
+    extract_df.loc[extract_df.index[:DELTA_ROWS], 'UnitCount'] += 1
+    extract_df.to_csv(extract_file, index=False)
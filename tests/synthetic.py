@@ -0,0 +1,111 @@
+"""Synthetic datasets shaped like the CoStar Denver extracts (for benchmarking)"""
+
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+
+DATE_RANGES = ['2018-2020', '2021-2022', '2023-2024', '2025-2026', '2027-2028']
+STATUSES = ['Existing', 'Under Construction', 'Proposed', 'Final Planning', 'Deferred']
+
+# Rough bounding box of the Denver metro:
+LAT_RANGE = (39.50, 40.10)
+LON_RANGE = (-105.30, -104.60)
+
+
+def year_to_range(years):
+    """Map years to the app's date range buckets (years outside them become NaN)"""
+    bins = [2018, 2021, 2023, 2025, 2027, 2029]
+    return pd.Series(pd.cut(years, bins=bins, labels=DATE_RANGES, right=False)).astype(object)
+
+
+def submarket_names(n_submarkets):
+    """Generate submarket names"""
+    return [f'Submarket {i:05d}' for i in range(n_submarkets)]
+
+
+def submarket_grid(n_submarkets):
+    """Lay submarkets out as a grid of cells over the metro: (columns, cell width, cell height)"""
+    n_cols = math.ceil(math.sqrt(n_submarkets))
+    n_rows = math.ceil(n_submarkets / n_cols)
+    return n_cols, (LON_RANGE[1] - LON_RANGE[0]) / n_cols, (LAT_RANGE[1] - LAT_RANGE[0]) / n_rows
+
+
+def make_property_df(n_properties, n_submarkets=19, seed=0):
+    """Generate a property construction DataFrame with the same columns as the CoStar CSV"""
+    rng = np.random.default_rng(seed)
+    start_year = rng.integers(2016, 2027, n_properties)
+    start_month = rng.integers(1, 13, n_properties)
+    completion_year = start_year + rng.integers(1, 3, n_properties)
+    names = np.array(submarket_names(n_submarkets))
+    # Place each property somewhere inside its submarket's grid cell:
+    submarket = rng.integers(0, n_submarkets, n_properties)
+    n_cols, cell_w, cell_h = submarket_grid(n_submarkets)
+    return pd.DataFrame({
+        'PropertyName': [f'Property {i}' for i in range(n_properties)],
+        'StartDate': pd.to_datetime({'year': start_year, 'month': start_month, 'day': 1}).dt.strftime('%Y-%m-%d'),
+        'Year Completed/Expected': completion_year,
+        'ConstructionStatus': rng.choice(STATUSES, n_properties),
+        'UnitCount': rng.integers(10, 500, n_properties),
+        'MarketName': 'Denver, CO',
+        'SubmarketName': names[submarket],
+        'Latitude': LAT_RANGE[0] + (submarket // n_cols + rng.uniform(0.01, 0.99, n_properties)) * cell_h,
+        'Longitude': LON_RANGE[0] + (submarket % n_cols + rng.uniform(0.01, 0.99, n_properties)) * cell_w,
+        'Year Started/Expected': start_year.astype(float),
+        'Start_year_range': year_to_range(start_year),
+        'Completion_year_range': year_to_range(completion_year),
+    })
+
+
+def make_ratio_df(n_submarkets=19, seed=0):
+    """Generate a submarket demand vs supply DataFrame with the same columns as the CoStar CSV"""
+    rng = np.random.default_rng(seed)
+    n_rows = n_submarkets * len(DATE_RANGES)
+    ratio_df = pd.DataFrame({
+        'SubmarketName': np.repeat(submarket_names(n_submarkets), len(DATE_RANGES)),
+        'year_range': np.tile(DATE_RANGES, n_submarkets),
+        'Demand': rng.integers(0, 3000, n_rows).astype(float),
+        'Supply': rng.integers(0, 3000, n_rows).astype(float),
+    })
+    ratio_df['demand_supply_ratio'] = np.where(ratio_df['Supply'] > 0, ratio_df['Demand'] / ratio_df['Supply'].where(ratio_df['Supply'] > 0, 1), 1)
+    return ratio_df
+
+
+def make_submarket_geojson(n_submarkets=19, vertices_per_edge=50):
+    """Generate a submarket GeoJSON dict (raw SubName/CBSAName columns) with one grid cell polygon per submarket
+
+    Cell edges get extra vertices so polygons are as detailed as real submarket boundaries.
+    """
+    n_cols, cell_w, cell_h = submarket_grid(n_submarkets)
+    t = np.linspace(0, 1, vertices_per_edge, endpoint=False)
+    features = []
+    for i, name in enumerate(submarket_names(n_submarkets)):
+        west, south = LON_RANGE[0] + (i % n_cols) * cell_w, LAT_RANGE[0] + (i // n_cols) * cell_h
+        east, north = west + cell_w, south + cell_h
+        ring = np.concatenate([
+            np.column_stack([west + t * cell_w, np.full_like(t, south)]),
+            np.column_stack([np.full_like(t, east), south + t * cell_h]),
+            np.column_stack([east - t * cell_w, np.full_like(t, north)]),
+            np.column_stack([np.full_like(t, west), north - t * cell_h]),
+            [[west, south]],
+        ])
+        features.append({
+            'type': 'Feature',
+            'properties': {'SubName': name + ' ', 'CBSAName': 'Denver, CO'},
+            'geometry': {'type': 'Polygon', 'coordinates': [ring.round(6).tolist()]},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def write_dataset(directory, n_properties, n_submarkets=19, seed=0):
+    """Write a synthetic data/ folder (both CSVs & the submarket GeoJSON) under directory, as the app expects it"""
+    data_dir = os.path.join(directory, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    make_property_df(n_properties, n_submarkets, seed).to_csv(os.path.join(data_dir, 'costar_denver_property_construction.csv'), index=False)
+    make_ratio_df(n_submarkets, seed).to_csv(os.path.join(data_dir, 'costar_denver_submarket_demand_supply.csv'), index=False)
+    with open(os.path.join(data_dir, 'denver.geojson'), 'w') as f:
+        json.dump(make_submarket_geojson(n_submarkets), f)
+    return data_dir
@@ -0,0 +1,42 @@
+"""The vectorized heatmap & point-layer builders must produce what the original row-by-row code sent to the map"""
+
+import json
+
+import numpy as np
+import pytest
+
+import denver_supply_app as app
+from tests.helpers import TOOLTIP_FIELDS, heat_data_rowwise, points_json_compact, points_json_rowwise
+from tests.synthetic import make_property_df
+
+
+@pytest.fixture(params=['properties', 'zero units'])
+def property_df(request):
+    """Synthetic properties, including the edge case where no property has any units"""
+    if request.param == 'zero units':
+        return make_property_df(50).assign(UnitCount=0)
+    return make_property_df(2_000)
+
+
+def test_heat_data_matches_rowwise(property_df):
+    expected, result = heat_data_rowwise(property_df), app.build_heat_data(property_df)
+    assert len(expected) == len(result)
+    assert np.array_equal(np.array(expected, dtype=float), np.array(result, dtype=float))
+
+
+def test_compact_points_match_rowwise(property_df):
+    # Compact points keep the tooltip values exactly & move by at most half the last kept decimal place:
+    expected_features = json.loads(points_json_rowwise(property_df))['features']
+    features = json.loads(points_json_compact(property_df))['features']
+    assert len(expected_features) == len(features)
+    for expected, feature in zip(expected_features, features):
+        assert feature['properties'] == {field: expected['properties'][field] for field in TOOLTIP_FIELDS}
+        assert np.allclose(feature['geometry']['coordinates'], expected['geometry']['coordinates'], rtol=0, atol=0.5 * 10**-app.COORDINATE_PRECISION + 1e-9)
+
+
+def test_heat_data_skips_blank_units():
+    property_df = make_property_df(20).astype({'UnitCount': 'Int32'})
+    property_df.loc[::4, 'UnitCount'] = None
+    weights = np.array(app.build_heat_data(property_df))[:, 2]
+    assert np.all(weights[::4] == 0)
+    assert np.isclose(weights.sum(), 1)
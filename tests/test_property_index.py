@@ -0,0 +1,43 @@
+"""The indexed property filter must keep the same rows as scanning the table"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import denver_supply_app as app
+from tests.synthetic import DATE_RANGES
+
+
+# No ranges, each range alone, a pair, a range with no properties & all of them:
+DATE_RANGE_SELECTIONS = [[]] + [[date_range] for date_range in DATE_RANGES] + [DATE_RANGES[1:3], ['1990-1995'], DATE_RANGES[::2] + ['1990-1995'], DATE_RANGES]
+
+# (south, west, north, east) viewports: part of the market, the whole market & an area with no properties:
+VIEWPORTS = [None, (39.7, -105.0, 39.9, -104.8), (39.0, -106.0, 41.0, -104.0), (45.0, -90.0, 46.0, -89.0)]
+
+
+@pytest.fixture
+def property_df(market_data):
+    """Loaded properties with some date ranges left blank"""
+    property_df = market_data['property_df'].copy()
+    property_df.loc[property_df.index[::7], 'Start_year_range'] = np.nan
+    property_df.loc[property_df.index[::9], 'Completion_year_range'] = np.nan
+    return property_df
+
+
+@pytest.mark.parametrize('data_type', list(app.DATE_RANGE_COLUMNS) + ['Demand vs Supply Ratio'])
+def test_indexed_filter_matches_scan(property_df, submarkets, data_type):
+    index = app.build_property_index(property_df)
+    for submarket, date_ranges, bounds in itertools.product(submarkets, DATE_RANGE_SELECTIONS, VIEWPORTS):
+        expected = app.filter_property_data(property_df, data_type, date_ranges, submarket, bounds=bounds)
+        result = app.filter_property_data(property_df, data_type, date_ranges, submarket, index=index, bounds=bounds)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_stale_index_falls_back_to_scan(property_df):
+    # An index built for other rows must not be used:
+    index = app.build_property_index(property_df.head(100))
+    expected = app.filter_property_data(property_df, 'Construction Starts', DATE_RANGES, 'All')
+    result = app.filter_property_data(property_df, 'Construction Starts', DATE_RANGES, 'All', index=index)
+    pd.testing.assert_frame_equal(result, expected)
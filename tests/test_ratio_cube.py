@@ -0,0 +1,22 @@
+"""The ratio cube must give the same demand & supply as scanning the ratio table"""
+
+import itertools
+
+import pandas as pd
+
+import denver_supply_app as app
+from tests.synthetic import DATE_RANGES
+
+
+# Each date range alone, a pair, non-adjacent ranges & all of them:
+DATE_RANGE_SELECTIONS = [[date_range] for date_range in DATE_RANGES] + [DATE_RANGES[1:3], DATE_RANGES[::2], DATE_RANGES]
+
+
+def test_ratio_cube_matches_scan(market_data, submarkets):
+    ratio_df, ratio_cube = market_data['ratio_df'], market_data['ratio_cube']
+    assert ratio_cube['periods'] == sorted(ratio_df['year_range'].dropna().unique().tolist())
+    for submarket, date_ranges in itertools.product(submarkets, DATE_RANGE_SELECTIONS):
+        expected = app.filter_ratio_data(ratio_df, date_ranges, submarket)
+        result = app.filter_ratio_data(ratio_df, date_ranges, submarket, cube=ratio_cube)
+        expected = expected.assign(SubmarketName=expected['SubmarketName'].astype(object))
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
@@ -0,0 +1,75 @@
+"""A refreshed market must hold what loading it from scratch would"""
+
+import json
+import os
+
+import denver_supply_app as app
+from tests.helpers import check_same, rewrite_extract, write_delta
+
+
+def test_unchanged_files_keep_market_data(market_dir):
+    market_data = app.build_market(app.DEFAULT_MARKET)
+    assert app.refresh_market(market_data) is market_data
+
+
+def test_delta_file(market_dir):
+    market_data = app.build_market(app.DEFAULT_MARKET)
+    write_delta(market_data, 1)
+    refreshed = app.refresh_market(market_data)
+    check_same(refreshed, app.build_market(app.DEFAULT_MARKET))
+    assert refreshed['version'] != market_data['version']
+
+
+def test_new_extract_keeps_loaded_delta(market_dir):
+    market_data = app.build_market(app.DEFAULT_MARKET)
+    write_delta(market_data, 1)
+    refreshed = app.refresh_market(market_data)
+    rewrite_extract()
+    check_same(app.refresh_market(refreshed), app.build_market(app.DEFAULT_MARKET))
+
+
+def test_deleted_delta_file(market_dir):
+    market_data = app.build_market(app.DEFAULT_MARKET)
+    write_delta(market_data, 1)
+    with_delta = app.refresh_market(market_data)
+    for delta_file in app.market_delta_files(app.DEFAULT_MARKET, 'property'):
+        os.remove(delta_file)
+    refreshed, rebuilt = app.refresh_market(with_delta), app.build_market(app.DEFAULT_MARKET)
+    check_same(refreshed, rebuilt)
+    assert len(refreshed['property_df']) == len(market_data['property_df'])
+    # Versions follow the loaded rows, so the same data gets its old version back:
+    assert refreshed['version'] == rebuilt['version'] == market_data['version'] != with_delta['version']
+
+
+def test_ratio_delta_file(market_dir):
+    market_data = app.build_market(app.DEFAULT_MARKET)
+    delta_df = market_data['ratio_df'].head(3).assign(Demand=lambda df: df['Demand'] * 2)
+    delta_df.to_csv(os.path.join(app.DATA_DIR, f'costar_{app.DEFAULT_MARKET}_submarket_demand_supply_delta_001.csv'), index=False)
+    refreshed, rebuilt = app.refresh_market(market_data), app.build_market(app.DEFAULT_MARKET)
+    for key in ['demand', 'supply', 'rows']:
+        assert (refreshed['ratio_cube'][key] == rebuilt['ratio_cube'][key]).all()
+
+
+def test_new_geojson_rebuilds_market(market_dir):
+    market_data = app.build_market(app.DEFAULT_MARKET)
+    geojson_file = app.market_files(app.DEFAULT_MARKET)['geojson']
+    with open(geojson_file) as f:
+        geojson = json.load(f)
+    geojson['features'] = geojson['features'][:-1]
+    with open(geojson_file, 'w') as f:
+        json.dump(geojson, f)
+    refreshed = app.refresh_market(market_data)
+    assert len(refreshed['submarket_gdf']) == len(market_data['submarket_gdf']) - 1
+    assert refreshed['geometry_version'] != market_data['geometry_version']
+    check_same(refreshed, app.build_market(app.DEFAULT_MARKET))
+
+
+def test_reload_after_eviction_keeps_version(market_dir):
+    # Versions follow the files, so a reload only matches maps cached for the same data:
+    store = app.MarketStore(max_bytes=0)
+    version = store.get(app.DEFAULT_MARKET)['version']
+    store.clear()
+    assert store.get(app.DEFAULT_MARKET)['version'] == version
+    write_delta(store.get(app.DEFAULT_MARKET), 1)
+    store.clear()
+    assert store.get(app.DEFAULT_MARKET)['version'] != version
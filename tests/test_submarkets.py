@@ -0,0 +1,59 @@
+"""Properties must be assigned to the submarket polygon they fall in & their labels checked against it"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+import denver_supply_app as app
+from tests.synthetic import make_property_df, make_submarket_geojson
+
+
+@pytest.fixture
+def submarket_gdf():
+    """Two squares sharing the border at longitude -104.9"""
+    return gpd.GeoDataFrame({'Submarket': ['West', 'East']}, geometry=[box(-105.0, 39.7, -104.9, 39.8), box(-104.9, 39.7, -104.8, 39.8)], crs='EPSG:4326')
+
+
+def test_reconcile_statuses(submarket_gdf):
+    property_df = pd.DataFrame({
+        'PropertyName': ['match', 'blank label', 'unknown label', 'mismatch', 'outside', 'border'],
+        'SubmarketName': ['West', None, 'Not A Submarket', 'West', 'East', 'East'],
+        'Longitude': [-104.95, -104.85, -104.95, -104.85, -104.5, -104.9],
+        'Latitude': [39.75, 39.75, 39.75, 39.75, 39.75, 39.75],
+    })
+    result = app.reconcile_submarkets(property_df, submarket_gdf)
+    assert result['SubmarketCheck'].tolist() == ['match', 'assigned', 'assigned', 'mismatch', 'outside', 'mismatch']
+    # Missing & unknown labels take the polygon's submarket, other labels are kept:
+    assert result['SubmarketName'].tolist() == ['West', 'East', 'West', 'West', 'East', 'East']
+    # The input frame is left as it was:
+    assert pd.isna(property_df['SubmarketName'].iloc[1])
+
+
+def test_reconcile_without_labels(submarket_gdf):
+    property_df = pd.DataFrame({'Longitude': [-104.95, -104.85, -104.5], 'Latitude': [39.75, 39.75, 39.75]})
+    result = app.reconcile_submarkets(property_df, submarket_gdf)
+    assert result['SubmarketCheck'].tolist() == ['assigned', 'assigned', 'outside']
+    assert result['SubmarketName'].tolist()[:2] == ['West', 'East']
+    assert pd.isna(result['SubmarketName'].iloc[2])
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_border_points_take_first_polygon(submarket_gdf, reverse):
+    if reverse:
+        submarket_gdf = submarket_gdf.iloc[::-1]
+    property_df = pd.DataFrame({'Longitude': [-104.9, -104.9, -105.0], 'Latitude': [39.75, 39.7, 39.8]})
+    first = submarket_gdf['Submarket'].iloc[0]
+    assert app.assign_submarkets(property_df, submarket_gdf).tolist() == [first, first, 'West']
+
+
+def test_chunked_join_matches_single_chunk():
+    submarket_gdf = gpd.GeoDataFrame.from_features(make_submarket_geojson(), crs='EPSG:4326').rename(columns={'SubName': 'Submarket'})
+    property_df = make_property_df(1_000)
+    expected = app.assign_submarkets(property_df, submarket_gdf, chunk_size=len(property_df))
+    # Chunks that don't divide the row count evenly, down to one row each:
+    for chunk_size in [1, 7, 333]:
+        assert np.array_equal(app.assign_submarkets(property_df, submarket_gdf, chunk_size=chunk_size), expected)
+    # Reprojected polygons give the same submarkets:
+    assert np.array_equal(app.assign_submarkets(property_df, submarket_gdf.to_crs('EPSG:3857')), expected)
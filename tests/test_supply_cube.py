@@ -0,0 +1,38 @@
+"""The supply cube must give the same totals as scanning the property table"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+import denver_supply_app as app
+from tests.synthetic import DATE_RANGES
+
+
+# Each date range alone, a pair, & all of them:
+DATE_RANGE_SELECTIONS = [[date_range] for date_range in DATE_RANGES] + [DATE_RANGES[1:3], DATE_RANGES]
+
+
+@pytest.mark.parametrize('data_type', list(app.DATE_RANGE_COLUMNS))
+def test_supply_cube_matches_scan(market_data, submarkets, data_type):
+    property_df = market_data['property_df']
+    for submarket, date_ranges in itertools.product(submarkets, DATE_RANGE_SELECTIONS):
+        stats = app.supply_cube_stats(market_data['supply_cube'], data_type, date_ranges, submarket)
+        filtered_df = app.filter_property_data(property_df, data_type, date_ranges, submarket)
+        assert stats['total_properties'] == len(filtered_df)
+        assert stats['total_units'] == filtered_df['UnitCount'].sum()
+        assert np.isclose(stats['avg_units'], filtered_df['UnitCount'].astype(float).mean(), equal_nan=True)
+
+
+def test_update_supply_cube_matches_rebuild(market_data):
+    property_df = market_data['property_df']
+    removed = np.zeros(len(property_df), dtype=bool)
+    removed[::5] = True
+    added_df = property_df[removed].head(100).assign(UnitCount=lambda df: df['UnitCount'] + 1)
+    updated_df = app.concat_tables([property_df[~removed], added_df])
+    cube = app.update_supply_cube(market_data['supply_cube'], updated_df, property_df[removed], added_df)
+    rebuilt = app.build_supply_cube(updated_df)
+    for data_type in app.DATE_RANGE_COLUMNS:
+        assert np.array_equal(cube[data_type]['units'], rebuilt[data_type]['units'])
+        assert np.array_equal(cube[data_type]['properties'], rebuilt[data_type]['properties'])
+        assert np.array_equal(cube[data_type]['unit_properties'], rebuilt[data_type]['unit_properties'])
@@ -0,0 +1,38 @@
+"""Date window filters & totals from the time index must match scanning property months"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+import denver_supply_app as app
+
+
+def date_windows(data_type):
+    """(first, last) month windows: single steps, spans across years, the whole history & windows outside it"""
+    step = app.TIME_INDEX_STEP_MONTHS[data_type]
+    windows = [(2021 * 12 + 2, 2022 * 12 + 7), (2019 * 12, 2026 * 12 + 11), (2015 * 12, 2035 * 12), (1990 * 12, 1995 * 12), (2040 * 12, 2041 * 12)]
+    rng = np.random.default_rng(0)
+    for first in rng.integers(2016 * 12, 2028 * 12, 10):
+        windows.append((int(first), int(first + rng.integers(0, 36))))
+    return [(first // step * step, last // step * step + step - 1) for first, last in windows]
+
+
+@pytest.mark.parametrize('data_type', list(app.TIME_INDEX_STEP_MONTHS))
+def test_window_filter_matches_scan(market_data, submarkets, data_type):
+    property_df, time_index = market_data['property_df'], market_data['time_index']
+    for submarket, date_window in itertools.product(submarkets, date_windows(data_type)):
+        expected = app.filter_property_data(property_df, data_type, [], submarket, date_window=date_window)
+        result = app.filter_property_data(property_df, data_type, [], submarket, date_window=date_window, time_index=time_index)
+        assert expected.index.equals(result.index)
+
+
+@pytest.mark.parametrize('data_type', list(app.TIME_INDEX_STEP_MONTHS))
+def test_window_stats_match_scan(market_data, submarkets, data_type):
+    property_df, time_index = market_data['property_df'], market_data['time_index']
+    for submarket, date_window in itertools.product(submarkets, date_windows(data_type)):
+        stats = app.time_index_stats(time_index, data_type, date_window, submarket)
+        filtered_df = app.filter_property_data(property_df, data_type, [], submarket, date_window=date_window)
+        assert stats['total_properties'] == len(filtered_df)
+        assert stats['total_units'] == filtered_df['UnitCount'].sum()
+        assert np.isclose(stats['avg_units'], filtered_df['UnitCount'].astype(float).mean(), equal_nan=True)